@@ -1,22 +1,31 @@
 import os
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, WebSocket, Header
+from fastapi.responses import StreamingResponse, JSONResponse
 from authlib.integrations.starlette_client import OAuth, OAuthError
 from starlette.requests import Request
 from starlette.responses import RedirectResponse
 from starlette.status import HTTP_400_BAD_REQUEST, HTTP_500_INTERNAL_SERVER_ERROR
 from jose import jwt, JWTError
-from datetime import datetime
+from datetime import datetime, date
+from calendar import monthrange
 from dotenv import load_dotenv
 from fastapi.security import OAuth2PasswordBearer
-from database import get_db
-from models import User, House, Booking
-from sqlalchemy.orm import Session
+from database import get_db, get_read_db, get_listing_db, ReadSession, mark_write, mark_listings_write, listings_written_recently, pool_stats, SessionLocal
+from models import User, House, Booking, IdempotencyKey, HouseCalendar, HouseMonthlyStats, HouseFacet, PRICE_BANDS
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import sessionmaker
 from sqlalchemy.future import select
-from database import engine
-from utils import hash_password, verify_password, create_jwt_token, verify_jwt_token
-from schemas import UserBase, UserUpdate, HouseCreate, HouseUpdate, HouseOut, BookingCreate, BookingOut
+from sqlalchemy import insert, update, delete, exists
+from sqlalchemy.exc import IntegrityError
+from cache import TTLCache, make_cached_response, conditional_response
+from export import stream_export
+from jobs import after_commit
+from uploads import PROFILE_PICTURE_DIR, save_upload, image_extension, generate_variants
+from realtime import hub
+from occupancy import update_calendar, update_calendars, add_months
+from serialization import house_out, house_page, house_list, house_facets, booking_list, list_response, dumps
+from utils import hash_password_async, verify_password_async, hash_stats, create_jwt_token, verify_jwt_token, encode_cursor, decode_cursor, to_prefix_tsquery
+from schemas import UserBase, UserUpdate, HouseCreate, HouseUpdate, HouseOut, HousePage, BookingCreate, BookingOut, OwnerDashboard, HouseBulkUpdate, BookingBulkStatus, BulkItemResult, HouseCalendarOut, OwnerReportRow, HouseFacets
 
 
 router = APIRouter()
@@ -36,17 +45,19 @@ oauth.register(
     client_kwargs={"scope": "openid email profile"},
 )
 
-# Create an AsyncSession instead of a regular session
-AsyncSessionLocal = sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-)
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+# authenticated users keyed by the token subject (email), so hot requests skip the users lookup
+user_cache = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_MAX_SIZE", "1024")),
+    ttl=float(os.getenv("USER_CACHE_TTL_SECONDS", "60")),
+)
+
 # Update the get_current_user function to properly extract user data
 async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+    return await user_from_token(token, db)
+
+async def user_from_token(token: str, db: AsyncSession):
     # Verify the JWT token
     payload = verify_jwt_token(token)
     if not payload:
@@ -57,6 +68,10 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
     if not user_email:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
 
+    user = user_cache.get(user_email)
+    if user:
+        return user
+
     # Retrieve the user from the database using the email
     stmt = select(User).filter(User.email == user_email)
     result = await db.execute(stmt)
@@ -65,10 +80,30 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
+    # Cache a detached copy: the instance is shared across requests and sessions, and a
+    # rollback in this request's session would otherwise expire its attributes
+    db.expunge(user)
+    user_cache.set(user_email, user)
+
     # Return the user (with all necessary attributes like id, role, etc.)
     return user
 
 
+@router.get("/cache/stats")
+async def cache_stats():
+    return {"user_cache": user_cache.stats()}
+
+
+@router.get("/hashing/stats")
+async def hashing_stats():
+    return hash_stats()
+
+
+@router.get("/db/pool")
+async def db_pool_stats():
+    return pool_stats()
+
+
 @router.get("/protected")
 async def protected_endpoint(request: Request):
     token = request.cookies.get("access_token")
@@ -119,7 +154,7 @@ async def auth(request: Request, db: Session = Depends(get_db)):
             await db.refresh(db_user)
 
         # Generate JWT token
-        jwt_token = create_jwt_token({"sub": db_user.email})
+        jwt_token = create_jwt_token({"sub": db_user.email, "id": db_user.id, "role": db_user.role})
 
         # Redirect user to frontend with token as query params
         frontend_url = "http://localhost:5173/google-auth"  # Change this to your frontend's redirect page
@@ -167,7 +202,7 @@ async def signup(user: UserBase, db: AsyncSession = Depends(get_db)):
     # Hash password and create user
     new_user = User(
         email=user.email,
-        password=hash_password(user.password),
+        password=await hash_password_async(user.password),
     )
 
     db.add(new_user)
@@ -186,11 +221,11 @@ async def login(user: UserBase, db: AsyncSession = Depends(get_db)):
     result = await db.execute(stmt)
     existing_user = result.scalars().first()
 
-    if not existing_user or not verify_password(user.password, existing_user.password):
+    if not existing_user or not await verify_password_async(user.password, existing_user.password):
         raise HTTPException(status_code=400, detail="Invalid credentials")
 
     # Generate JWT token
-    jwt_token = create_jwt_token({"sub": existing_user.email})
+    jwt_token = create_jwt_token({"sub": existing_user.email, "id": existing_user.id, "role": existing_user.role})
 
     return {"access_token": jwt_token, "token_type": "bearer", "user": existing_user}
 
@@ -219,19 +254,14 @@ async def update_user_profile(
 
     
     if file:
-        upload_dir = "uploads/profile_pictures"
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        file_extension = os.path.splitext(file.filename)[1]
-        new_filename = f"user_{user_id}_{int(datetime.utcnow().timestamp())}{file_extension}"
-        file_path = os.path.join(upload_dir, new_filename)
-        
-        with open(file_path, "wb") as f:
-            content = await file.read()  # Read file content asynchronously
-            f.write(content)
+        extension = image_extension(file)
+        os.makedirs(PROFILE_PICTURE_DIR, exist_ok=True)
 
+        # content-addressed, size-capped write; thumbnails are built after the response is sent
+        file_path = await save_upload(file, PROFILE_PICTURE_DIR, extension)
+        after_commit(db, generate_variants, file_path)
 
-        
+        # the replaced picture is left to the unused-upload sweep in maintenance.py
         db_user.profile_picture = file_path
 
     if username:
@@ -245,18 +275,22 @@ async def update_user_profile(
     await db.commit()
     await db.refresh(db_user)
 
+    # drop the stale cached copy so the next request reloads the updated profile
+    user_cache.invalidate(db_user.email)
+
     return {"user": db_user}
 
 
 
 
 
+
+
 # --------------------------------houses------------------------------
 
 # create house
 @router.post("/houses", response_model=HouseOut)
 async def create_house(house: HouseCreate, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
-    print(current_user)
     new_house = House(
         title=house.title,
         description=house.description,
@@ -268,20 +302,239 @@ async def create_house(house: HouseCreate, db: AsyncSession = Depends(get_db), c
     db.add(new_house)
     await db.commit()
     await db.refresh(new_house)
+    invalidate_listings(current_user.id)
 
     return new_house
 
 
-# get all houses
-from typing import List
-@router.get("/houses", response_model=List[HouseOut])
-async def get_houses(db: AsyncSession = Depends(get_db)):
-    stmt = select(House)
-    
+from typing import List, Optional
+from fastapi import Query
+from sqlalchemy import tuple_, literal, func, true, any_, DateTime
+
+async def paginate_houses(db: AsyncSession, stmt, limit: int, cursor: Optional[str]):
+    # seek past the last row of the previous page instead of using OFFSET
+    if cursor:
+        created_at, house_id = decode_cursor(cursor)
+        stmt = stmt.filter(tuple_(House.created_at, House.id) < tuple_(created_at, house_id))
+
+    # fetch one extra row to know whether there is a next page
+    stmt = stmt.order_by(House.created_at.desc(), House.id.desc()).limit(limit + 1)
+
     result = await db.execute(stmt)
     houses = result.scalars().all()
 
-    return houses
+    next_cursor = None
+    if len(houses) > limit:
+        houses = houses[:limit]
+        next_cursor = encode_cursor(houses[-1].created_at, houses[-1].id)
+
+    return {"items": houses, "next_cursor": next_cursor}
+
+# active (not cancelled) bookings whose stay overlaps [check_in, check_out)
+def overlapping_bookings(check_in: datetime, check_out: datetime):
+    window = func.tstzrange(
+        literal(check_in, DateTime(timezone=True)),
+        literal(check_out, DateTime(timezone=True)),
+        "[)",
+    )
+    # the check_in bound lets postgres skip partitions that start after the window
+    return (Booking.status != 'cancel') & (Booking.check_in < check_out) & Booking.stay.overlaps(window)
+
+
+# Booking lists can be limited to stays that start on or after `since`; the check_in bound
+# lets postgres skip the partitions before it. Without it they return every booking.
+def bookings_since(since: Optional[datetime]):
+    if since is None:
+        return true()
+    return Booking.check_in >= since
+
+
+# serialized public listing payloads; any house write clears it, and the TTL bounds
+# how long another worker's writes can go unseen here
+listing_cache = TTLCache(
+    maxsize=int(os.getenv("LISTING_CACHE_MAX_SIZE", "512")),
+    ttl=float(os.getenv("LISTING_CACHE_TTL_SECONDS", "30")),
+)
+LISTING_MAX_AGE = int(os.getenv("LISTING_MAX_AGE_SECONDS", "0"))
+
+# called after every house write; listing reads then go to the primary for a while,
+# and so do the writer's own reads when the writer is known
+def invalidate_listings(writer_id: Optional[int] = None):
+    listing_cache.clear()
+    mark_listings_write()
+    if writer_id is not None:
+        mark_write(writer_id)
+
+# a page read right after a house write may predate it on a replica, so it isn't kept
+def cache_listing(key, entry):
+    if not listings_written_recently():
+        listing_cache.set(key, entry)
+
+
+# get all houses, newest first, keyset paginated on (created_at, id)
+@router.get("/houses", response_model=HousePage)
+async def get_houses(
+    request: Request,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    location: Optional[str] = None,
+    owner_id: Optional[int] = None,
+    price_band: Optional[int] = Query(None, ge=0, le=len(PRICE_BANDS)),
+    db: AsyncSession = Depends(get_listing_db)
+):
+    key = ("houses", limit, cursor, min_price, max_price, location, owner_id, price_band)
+    entry = listing_cache.get(key)
+    if entry is None:
+        page = await query_houses(db, limit, cursor, min_price, max_price, location, owner_id, price_band)
+        body = dumps(house_page, page)
+        last_modified = max((house.updated_at for house in page["items"]), default=None)
+        entry = make_cached_response(body, last_modified)
+        cache_listing(key, entry)
+
+    return conditional_response(request, entry, LISTING_MAX_AGE)
+
+async def query_houses(db: AsyncSession, limit, cursor, min_price, max_price, location, owner_id, price_band=None):
+    stmt = select(House)
+
+    if min_price is not None:
+        stmt = stmt.filter(House.price >= min_price)
+    if max_price is not None:
+        stmt = stmt.filter(House.price <= max_price)
+    if location:
+        stmt = stmt.filter(House.location == location)
+    if owner_id is not None:
+        stmt = stmt.filter(House.user_id == owner_id)
+    if price_band is not None:
+        stmt = stmt.filter(price_band_filter(price_band))
+
+    return await paginate_houses(db, stmt, limit, cursor)
+
+
+# the houses of one facet price band, as the range [lower, upper) on price so the price
+# index still applies; houses without a price count as 0, like width_bucket in house_facets
+def price_band_filter(band: int):
+    condition = true()
+    if band > 0:
+        condition &= House.price >= PRICE_BANDS[band - 1]
+    if band < len(PRICE_BANDS):
+        condition &= House.price < PRICE_BANDS[band]
+    if band == 0:
+        condition |= House.price.is_(None)
+    return condition
+
+
+# Facet counts for the browse page: houses per location and per price band, read from
+# the trigger-maintained house_facets summary instead of grouping the listings. Each
+# facet is filtered by the other one's selection, so the counts match get_houses results.
+@router.get("/houses/facets", response_model=HouseFacets)
+async def get_house_facets(
+    request: Request,
+    location: Optional[str] = None,
+    price_band: Optional[int] = Query(None, ge=0, le=len(PRICE_BANDS)),
+    db: AsyncSession = Depends(get_listing_db)
+):
+    key = ("facets", location, price_band)
+    entry = listing_cache.get(key)
+    if entry is None:
+        result = await db.execute(select(HouseFacet).filter(HouseFacet.houses > 0))
+        facets = result.scalars().all()
+
+        locations, bands, total = {}, {}, 0
+        for facet in facets:
+            in_location = location is None or facet.location == location
+            in_band = price_band is None or facet.price_band == price_band
+            if in_band:
+                locations[facet.location] = locations.get(facet.location, 0) + facet.houses
+            if in_location:
+                bands[facet.price_band] = bands.get(facet.price_band, 0) + facet.houses
+            if in_location and in_band:
+                total += facet.houses
+
+        body = dumps(house_facets, {
+            "total": total,
+            "locations": [
+                {"value": value, "count": count}
+                for value, count in sorted(locations.items(), key=lambda item: (-item[1], item[0]))
+            ],
+            # bands are [min_price, max_price); get_houses takes the band as price_band
+            "price_bands": [
+                {
+                    "band": band,
+                    "min_price": PRICE_BANDS[band - 1] if band > 0 else None,
+                    "max_price": PRICE_BANDS[band] if band < len(PRICE_BANDS) else None,
+                    "count": bands.get(band, 0),
+                }
+                for band in range(len(PRICE_BANDS) + 1)
+            ],
+        })
+        entry = make_cached_response(body)
+        cache_listing(key, entry)
+
+    return conditional_response(request, entry, LISTING_MAX_AGE)
+
+
+# search houses that are free for the whole [check_in, check_out) window
+@router.get("/houses/available", response_model=HousePage)
+async def get_available_houses(
+    check_in: datetime,
+    check_out: datetime,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    location: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    if check_out <= check_in:
+        raise HTTPException(status_code=400, detail="check_out must be after check_in")
+
+    # one anti-join answered by the GiST index on bookings (house_id, stay)
+    taken = select(Booking.id).filter(
+        Booking.house_id == House.id,
+        overlapping_bookings(check_in, check_out),
+    )
+    stmt = select(House).filter(~taken.exists())
+
+    if location:
+        stmt = stmt.filter(House.location == location)
+
+    return await paginate_houses(db, stmt, limit, cursor)
+
+
+# ranked full-text search over title, location and description; every term is
+# prefix matched so it also serves typeahead
+@router.get("/houses/search", response_model=List[HouseOut])
+async def search_houses(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_db)
+):
+    tsquery_text = to_prefix_tsquery(q)
+    if not tsquery_text:
+        return []
+
+    query = func.to_tsquery("english", tsquery_text)
+    stmt = (
+        select(House)
+        .filter(House.search_vector.op("@@")(query))
+        .order_by(func.ts_rank_cd(House.search_vector, query).desc(), House.id.desc())
+        .limit(limit)
+    )
+
+    result = await db.execute(stmt)
+    return list_response(house_list, result.scalars().all())
+
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# stream every house as NDJSON or CSV for reporting jobs
+@router.get("/houses/export")
+async def export_houses(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    current_user: dict = Depends(get_current_user)
+):
+    stmt = select(House).order_by(House.id)
+    return StreamingResponse(stream_export(stmt, HouseOut, format), media_type=EXPORT_MEDIA_TYPES[format])
 
 
 # get houses of a logged in user 
@@ -293,7 +546,170 @@ async def get_houses_of_user(db: AsyncSession = Depends(get_db), current_user: d
     result = await db.execute(stmt)
     houses = result.scalars().all()
 
-    return houses
+    return list_response(house_list, houses)
+
+# owner dashboard: the owner's houses with their bookings and per-status counts.
+# One page of houses, one selectinload query for their bookings and one grouped count.
+@router.get("/owner/dashboard", response_model=OwnerDashboard)
+async def get_owner_dashboard(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    in_window = bookings_since(since)
+    stmt = (
+        select(House)
+        .filter(House.user_id == current_user.id)
+        .options(selectinload(House.bookings.and_(in_window)))
+    )
+    page = await paginate_houses(db, stmt, limit, cursor)
+
+    items = []
+    for house in page["items"]:
+        counts = {}
+        for booking in house.bookings:
+            counts[booking.status] = counts.get(booking.status, 0) + 1
+        items.append({
+            **HouseOut.model_validate(house).model_dump(),
+            "bookings": house.bookings,
+            "status_counts": counts,
+        })
+
+    # totals across all of the owner's houses in the same window, not just this page.
+    # The house ids are collected into an array first, so every bookings partition is
+    # probed through its (house_id, check_in) index instead of hash joined in full.
+    owner_houses = func.array(select(House.id).filter(House.user_id == current_user.id).scalar_subquery())
+    stmt = (
+        select(Booking.status, func.count(Booking.id))
+        .filter(Booking.house_id == any_(owner_houses), in_window)
+        .group_by(Booking.status)
+    )
+    result = await db.execute(stmt)
+
+    return {"items": items, "next_cursor": page["next_cursor"], "status_counts": dict(result.all())}
+
+# ---- bulk house operations, each batch is one statement in one transaction ----
+MAX_BULK_ITEMS = 500
+
+def check_batch_size(items):
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch is limited to {MAX_BULK_ITEMS} items")
+
+# create many houses with a single multi-row INSERT ... RETURNING
+@router.post("/houses/bulk", response_model=List[HouseOut])
+async def bulk_create_houses(houses: List[HouseCreate], db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    check_batch_size(houses)
+
+    rows = [{**house.model_dump(), "user_id": current_user.id} for house in houses]
+    result = await db.scalars(insert(House).returning(House), rows)
+    new_houses = result.all()
+    await db.commit()
+    invalidate_listings(current_user.id)
+
+    return new_houses
+
+# update many of the owner's houses with one executemany UPDATE by primary key
+@router.patch("/houses/bulk", response_model=List[BulkItemResult])
+async def bulk_update_houses(houses: List[HouseBulkUpdate], db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    check_batch_size(houses)
+
+    ids = [house.id for house in houses]
+    stmt = select(House.id).filter(House.id.in_(ids), House.user_id == current_user.id)
+    result = await db.execute(stmt)
+    owned = set(result.scalars().all())
+
+    now = datetime.utcnow()
+    rows = [{**house.model_dump(), "updated_at": now} for house in houses if house.id in owned]
+    if rows:
+        await db.execute(update(House), rows)
+        await db.commit()
+        invalidate_listings(current_user.id)
+
+    return [{"id": id, "result": "updated" if id in owned else "not_found"} for id in ids]
+
+# delete many of the owner's houses with one DELETE ... RETURNING
+@router.delete("/houses/bulk", response_model=List[BulkItemResult])
+async def bulk_delete_houses(ids: List[int] = Body(...), db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    check_batch_size(ids)
+
+    # bookings.house_id has no ON DELETE rule, so houses with bookings are left in place
+    has_bookings = exists().where(Booking.house_id == House.id)
+    stmt = (
+        delete(House)
+        .where(House.id.in_(ids), House.user_id == current_user.id, ~has_bookings)
+        .returning(House.id)
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        result = await db.execute(stmt)
+        deleted = set(result.scalars().all())
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        # a booking was made on one of the houses while they were being deleted
+        if e.orig.pgcode == FOREIGN_KEY_VIOLATION:
+            raise HTTPException(status_code=409, detail="A house was booked while deleting, retry the request")
+        raise
+    invalidate_listings(current_user.id)
+
+    # only the ids that weren't deleted pay for a lookup to explain why
+    kept = set()
+    if len(deleted) < len(set(ids)):
+        stmt = select(House.id).where(House.id.in_(set(ids) - deleted), House.user_id == current_user.id)
+        kept = set((await db.scalars(stmt)).all())
+
+    return [
+        {"id": id, "result": "deleted" if id in deleted else "has_bookings" if id in kept else "not_found"}
+        for id in ids
+    ]
+
+# revenue (confirmed nights x current price), occupancy and bookings by status per
+# house and month, read from the trigger-maintained house_monthly_stats aggregate
+@router.get("/owner/reports", response_model=List[OwnerReportRow])
+async def get_owner_reports(
+    start: Optional[date] = None,
+    months: int = Query(12, ge=1, le=36),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    first = (start or datetime.utcnow().date()).replace(day=1)
+    end = add_months(first, months)
+
+    stmt = (
+        select(HouseMonthlyStats, House.title, House.price)
+        .join(House, House.id == HouseMonthlyStats.house_id)
+        .filter(
+            House.user_id == current_user.id,
+            HouseMonthlyStats.month >= first,
+            HouseMonthlyStats.month < end,
+        )
+        .order_by(HouseMonthlyStats.house_id, HouseMonthlyStats.month)
+    )
+    result = await db.execute(stmt)
+
+    reports = {}
+    for stats, title, price in result.all():
+        row = reports.setdefault((stats.house_id, stats.month), {
+            "house_id": stats.house_id,
+            "title": title,
+            "month": stats.month,
+            "nights": {},
+            "bookings": {},
+            "price": price or 0,
+        })
+        row["nights"][stats.status] = stats.nights
+        row["bookings"][stats.status] = stats.bookings
+
+    for row in reports.values():
+        booked = row["nights"].get("confirm", 0)
+        row["revenue"] = booked * row.pop("price")
+        row["occupancy_rate"] = booked / monthrange(row["month"].year, row["month"].month)[1]
+
+    return list(reports.values())
 
 # get a specific house for a logged in user
 @router.get("/houses/user/{house_id}", response_model=HouseOut)
@@ -311,17 +727,56 @@ async def get_house_of_user_by_id(house_id: int, db: AsyncSession = Depends(get_
 
 # get a specific house 
 @router.get("/houses/{house_id}", response_model=HouseOut)
-async def get_house_by_id(house_id: int, db: AsyncSession = Depends(get_db)):
-    # Get the specific house by ID and filter by the current user's ID 
-    stmt = select(House).filter(House.id == house_id)
+async def get_house_by_id(house_id: int, request: Request, db: AsyncSession = Depends(get_listing_db)):
+    key = ("house", house_id)
+    entry = listing_cache.get(key)
+    if entry is None:
+        # Get the specific house by ID and filter by the current user's ID 
+        stmt = select(House).filter(House.id == house_id)
 
-    result = await db.execute(stmt)
-    house = result.scalars().first()
+        result = await db.execute(stmt)
+        house = result.scalars().first()
 
-    if not house:
-        raise HTTPException(status_code=404, detail="House not found or not authorized to view this house")
+        if not house:
+            raise HTTPException(status_code=404, detail="House not found or not authorized to view this house")
 
-    return house
+        body = dumps(house_out, house)
+        entry = make_cached_response(body, house.updated_at)
+        cache_listing(key, entry)
+
+    return conditional_response(request, entry, LISTING_MAX_AGE)
+
+# occupancy calendar served from the precomputed month bitmaps in house_calendars:
+# one primary key range scan returning two integers per month
+@router.get("/houses/{house_id}/calendar", response_model=HouseCalendarOut)
+async def get_house_calendar(
+    house_id: int,
+    start: Optional[date] = None,
+    months: int = Query(3, ge=1, le=24),
+    db: AsyncSession = Depends(get_read_db)
+):
+    first = (start or datetime.utcnow().date()).replace(day=1)
+    end = add_months(first, months)
+
+    stmt = select(HouseCalendar).filter(
+        HouseCalendar.house_id == house_id,
+        HouseCalendar.month >= first,
+        HouseCalendar.month < end,
+    )
+    result = await db.execute(stmt)
+    rows = {row.month: row for row in result.scalars().all()}
+
+    return {
+        "house_id": house_id,
+        "months": [
+            {
+                "month": month,
+                "booked": rows[month].booked if month in rows else 0,
+                "pending": rows[month].pending if month in rows else 0,
+            }
+            for month in (add_months(first, i) for i in range(months))
+        ],
+    }
 
 # update house 
 @router.patch("/houses/{house_id}", response_model=HouseOut)
@@ -341,6 +796,7 @@ async def update_house(house_id: int, house: HouseUpdate, db: AsyncSession = Dep
 
     await db.commit()
     await db.refresh(existing_house)
+    invalidate_listings()
 
     return existing_house
 
@@ -357,6 +813,7 @@ async def delete_house(house_id: int, db: AsyncSession = Depends(get_db)):
 
     await db.delete(house)
     await db.commit()
+    invalidate_listings()
 
     return house
 
@@ -365,11 +822,44 @@ async def delete_house(house_id: int, db: AsyncSession = Depends(get_db)):
 
 
 # --------------------------------------bookings----------------------------------
-from sqlalchemy.sql import or_
 
-# create a booking
+# postgres error codes raised by the booking constraints
+UNIQUE_VIOLATION = "23505"
+EXCLUSION_VIOLATION = "23P01"
+FOREIGN_KEY_VIOLATION = "23503"
+
+# the stored response of an earlier request with the same Idempotency-Key, if any
+async def replay_idempotent(db: AsyncSession, user_id: int, key: str, endpoint: str):
+    record = await db.get(IdempotencyKey, (user_id, key))
+    if not record:
+        return None
+
+    if record.endpoint != endpoint:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+
+    return JSONResponse(record.response, status_code=record.status_code)
+
+
+# create a booking. Overlaps are rejected by the bookings_no_overlap trigger (as an
+# exclusion violation), so concurrent double-submits can't both succeed.
 @router.post("/bookings", response_model=BookingOut)
-async def create_booking(booking: BookingCreate, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
+async def create_booking(
+    booking: BookingCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    # read up front: the rollback below expires every instance in the session
+    user_id = current_user.id
+
+    if idempotency_key:
+        replay = await replay_idempotent(db, user_id, idempotency_key, "POST /bookings")
+        if replay:
+            return replay
+
+    if booking.check_out <= booking.check_in:
+        raise HTTPException(status_code=400, detail="check_out must be after check_in")
+
     # Check if house exists
     stmt = select(House).filter(House.id == booking.house_id)
     result = await db.execute(stmt)
@@ -378,61 +868,125 @@ async def create_booking(booking: BookingCreate, db: AsyncSession = Depends(get_
 
     if not house:
         raise HTTPException(status_code=404, detail="House not found")
-    
-
-    # Check if the dates overlap with existing bookings
-    stmt = select(Booking).filter(
-        Booking.house_id == booking.house_id,
-        Booking.status != booking.status,
-        or_(Booking.check_in <= booking.check_out, Booking.check_out >= booking.check_in)
-    )
-    result = await db.execute(stmt)
-    conflicting_booking = result.scalars().first()
-
-    if conflicting_booking:
-        raise HTTPException(status_code=400, detail="The property is already booked for these dates")
 
     # Create new booking
     new_booking = Booking(
         house_id=booking.house_id,
-        user_id=current_user.id,
+        user_id=user_id,
         check_in=booking.check_in,
         check_out=booking.check_out,
     )
-    db.add(new_booking)
-    await db.commit()
-    await db.refresh(new_booking)
+    try:
+        db.add(new_booking)
+        await db.flush()
+        await update_calendar(db, new_booking, "pending")
+
+        # stored in the same transaction, so a retry sees either nothing or the committed booking
+        if idempotency_key:
+            db.add(IdempotencyKey(
+                user_id=user_id,
+                key=idempotency_key,
+                endpoint="POST /bookings",
+                status_code=200,
+                response=BookingOut.model_validate(new_booking).model_dump(mode="json"),
+            ))
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if e.orig.pgcode == EXCLUSION_VIOLATION:
+            raise HTTPException(status_code=400, detail="The property is already booked for these dates")
+        # a concurrent request with the same key committed first
+        if idempotency_key and e.orig.pgcode == UNIQUE_VIOLATION:
+            replay = await replay_idempotent(db, user_id, idempotency_key, "POST /bookings")
+            if replay:
+                return replay
+        raise
+
+    publish_booking_event("booking.created", new_booking, new_booking.user_id, house.user_id)
 
     return new_booking
 
 
-# confirm the booking 
-@router.put("/bookings/{booking_id}/confirm")
-async def confirm_booking(booking_id: int, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
-    stmt = select(Booking).filter(Booking.id == booking_id)
-    result = await db.execute(stmt) 
-    booking = result.scalars().first()
+# after a booking change commits: keep the renter's and owner's reads on the primary
+# for a moment and push the event to their open feeds
+def publish_booking_event(event: str, booking, *user_ids):
+    message = {
+        "type": event,
+        "booking": BookingOut.model_validate(booking).model_dump(mode="json"),
+    }
+    for user_id in set(user_ids):
+        mark_write(user_id)
+        hub.publish(user_id, message)
 
-    if not booking:
-        raise HTTPException(status_code=404, detail="Booking not found")
-    
-    if booking.status == 'cancel':
-        raise HTTPException(status_code=400, detail="Canceled bookings cannot be confirmed")
 
-    # Ensure that `house` is loaded first
-    stmt = select(House).filter(House.id == booking.house_id)
+# live booking updates; browsers can't set headers on a WebSocket, so the token comes as a query param
+@router.websocket("/ws/bookings")
+async def bookings_feed(websocket: WebSocket, token: str):
+    # a short-lived session, so idle connections don't pin pool connections
+    try:
+        async with SessionLocal() as db:
+            user = await user_from_token(token, db)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    await hub.serve(websocket, user.id)
+
+
+# Move a booking on one of the owner's houses to new_status with a single guarded
+# UPDATE ... FROM houses ... RETURNING, so concurrent confirm/cancel can't race.
+async def transition_booking(db: AsyncSession, booking_id: int, owner_id: int, new_status: str):
+    stmt = (
+        update(Booking)
+        .where(
+            Booking.id == booking_id,
+            Booking.house_id == House.id,
+            House.user_id == owner_id,
+            Booking.status != 'cancel',
+        )
+        .values(status=new_status)
+        .returning(Booking)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.scalars(stmt)
+    booking = result.first()
+
+    if booking:
+        await update_calendar(db, booking, new_status)
+        await db.commit()
+        return booking
+
+    # nothing matched; only this error path pays for a lookup to explain why
+    stmt = (
+        select(Booking.status, House.user_id)
+        .outerjoin(House, House.id == Booking.house_id)
+        .filter(Booking.id == booking_id)
+    )
     result = await db.execute(stmt)
-    house = result.scalars().first()
+    row = result.first()
 
-    if not house:
+    if not row:
+        raise HTTPException(status_code=404, detail="Booking not found")
+
+    booking_status, house_owner_id = row
+    if house_owner_id is None:
         raise HTTPException(status_code=404, detail="House not found")
 
-    if house.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized to confirm this booking")
+    if house_owner_id != owner_id:
+        raise HTTPException(status_code=403, detail=f"Not authorized to {new_status} this booking")
+
+    if new_status == 'cancel':
+        raise HTTPException(status_code=400, detail="Booking is already cancelled")
+    raise HTTPException(status_code=400, detail="Canceled bookings cannot be confirmed")
+
+
+# confirm the booking 
+@router.put("/bookings/{booking_id}/confirm")
+async def confirm_booking(booking_id: int, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    booking = await transition_booking(db, booking_id, current_user.id, 'confirm')
 
-    booking.status = 'confirm'
-    await db.commit() 
-    await db.refresh(booking)
+    publish_booking_event("booking.confirm", booking, booking.user_id, current_user.id)
 
     return booking
 
@@ -441,52 +995,72 @@ async def confirm_booking(booking_id: int, db: AsyncSession = Depends(get_db), c
 # cancel the booking 
 @router.put("/bookings/{booking_id}/cancel")
 async def cancel_booking(booking_id: int, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
-    stmt = select(Booking).filter(Booking.id == booking_id)
-    result = await db.execute(stmt) 
-    booking = result.scalars().first()
+    booking = await transition_booking(db, booking_id, current_user.id, 'cancel')
 
-    if not booking:
-        raise HTTPException(status_code=404, detail="Booking not found")
-    
-    if booking.status == 'cancel':
-        raise HTTPException(status_code=400, detail="Booking is already cancelled")
+    publish_booking_event("booking.cancel", booking, booking.user_id, current_user.id)
 
-    # Ensure that `house` is loaded first
-    stmt = select(House).filter(House.id == booking.house_id)
-    result = await db.execute(stmt)
-    house = result.scalars().first()
+    return booking
 
-    if not house:
-        raise HTTPException(status_code=404, detail="House not found")
+# confirm or cancel many bookings on the owner's houses with one UPDATE ... RETURNING
+@router.post("/bookings/bulk/status", response_model=List[BulkItemResult])
+async def bulk_update_booking_status(batch: BookingBulkStatus, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    check_batch_size(batch.ids)
+
+    owned_houses = select(House.id).filter(House.user_id == current_user.id)
+    stmt = (
+        update(Booking)
+        .where(
+            Booking.id.in_(batch.ids),
+            Booking.house_id.in_(owned_houses),
+            Booking.status != 'cancel',
+        )
+        .values(status=batch.status)
+        .returning(Booking)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.scalars(stmt)
+    bookings = result.all()
+    await update_calendars(db, bookings, batch.status)
+    await db.commit()
 
-    if house.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized to cancel this booking")
+    for booking in bookings:
+        publish_booking_event(f"booking.{batch.status}", booking, booking.user_id, current_user.id)
 
-    booking.status = 'cancel'
-    await db.commit() 
-    await db.refresh(booking)
+    changed = {booking.id for booking in bookings}
 
-    return booking
+    return [{"id": id, "result": batch.status if id in changed else "skipped"} for id in batch.ids]
 
 # get bookings to a specific user 
 @router.get("/bookings/user", response_model=List[BookingOut])
 async def get_user_bookings(
-    db: AsyncSession = Depends(get_db),
+    since: Optional[datetime] = None,
     current_user: dict = Depends(get_current_user)
 ):
-    stmt = select(Booking).filter(Booking.user_id == current_user.id)
-    result = await db.execute(stmt)
-    bookings = result.scalars().all()
+    # replica read, unless this user just changed a booking
+    async with ReadSession(current_user.id) as db:
+        stmt = select(Booking).filter(Booking.user_id == current_user.id, bookings_since(since))
+        result = await db.execute(stmt)
+        bookings = result.scalars().all()
 
-    return bookings
+    return list_response(booking_list, bookings)
 
 # get all bookings
 @router.get("/bookings/all", response_model=List[BookingOut])
 async def get_all_bookings(
-    db: AsyncSession = Depends(get_db)
+    since: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_read_db)
 ):
-    stmt = select(Booking)
+    stmt = select(Booking).filter(bookings_since(since))
     result = await db.execute(stmt)
     bookings = result.scalars().all()
 
-    return bookings
\ No newline at end of file
+    return list_response(booking_list, bookings)
+
+# stream every booking as NDJSON or CSV for reporting jobs
+@router.get("/bookings/export")
+async def export_bookings(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    current_user: dict = Depends(get_current_user)
+):
+    stmt = select(Booking).order_by(Booking.id)
+    return StreamingResponse(stream_export(stmt, BookingOut, format), media_type=EXPORT_MEDIA_TYPES[format])
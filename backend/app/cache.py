@@ -0,0 +1,83 @@
+import time
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime
+from collections import OrderedDict
+from fastapi import Request, Response
+
+
+# small in-process LRU cache with a per-entry TTL
+class TTLCache:
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self):
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# A serialized JSON payload with the validators used for conditional GETs.
+# The ETag hashes the body, so it stays correct across workers and deletes.
+def make_cached_response(body: bytes, last_modified=None):
+    entry = {
+        "body": body,
+        "etag": f'"{hashlib.sha1(body).hexdigest()}"',
+        "last_modified": None,
+    }
+    if last_modified:
+        entry["last_modified"] = format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+    return entry
+
+
+def conditional_response(request: Request, entry, max_age: int) -> Response:
+    headers = {
+        "ETag": entry["etag"],
+        "Cache-Control": f"public, max-age={max_age}, must-revalidate",
+    }
+    if entry["last_modified"]:
+        headers["Last-Modified"] = entry["last_modified"]
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in tags or entry["etag"] in tags:
+            return Response(status_code=304, headers=headers)
+
+    return Response(entry["body"], media_type="application/json", headers=headers)
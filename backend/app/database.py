@@ -1,16 +1,86 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy import text
+from typing import Optional
 import os
+import time
+import asyncio
+import itertools
+import logging
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Optional comma separated read replicas, e.g. postgresql+asyncpg://...@replica1/db,postgresql+asyncpg://...@replica2/db
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_HEALTH_INTERVAL = float(os.getenv("REPLICA_HEALTH_INTERVAL", "10"))
+# how long a user's reads stay on the primary after they wrote, to cover replication lag
+READ_AFTER_WRITE_SECONDS = float(os.getenv("READ_AFTER_WRITE_SECONDS", "5"))
 
-# Use asyncpg with SQLAlchemy
-engine = create_async_engine(DATABASE_URL, echo=True, future=True)
+# Pool tuning, all overridable from the environment
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() == "true"
 
-# Async session
+
+# Queue pool that records how long each checkout waited for a free connection. Opening a
+# new connection is not waiting, so that time is left out; every engine's pool keeps its
+# own counters.
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.acquire_count = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    # the connect time rides on the new record back to the _do_get that created it
+    def _create_connection(self):
+        start = time.perf_counter()
+        record = super()._create_connection()
+        record.connect_seconds = time.perf_counter() - start
+        return record
+
+    def _do_get(self):
+        start = time.perf_counter()
+        record = super()._do_get()
+        wait = time.perf_counter() - start - record.__dict__.pop("connect_seconds", 0.0)
+        self.acquire_count += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        return record
+
+
+# Use asyncpg with SQLAlchemy. The UTC timezone is sent as a startup parameter,
+# so every connection is initialised once on connect instead of once per request.
+def make_engine(url: str):
+    return create_async_engine(
+        url,
+        echo=SQL_ECHO,
+        poolclass=TimedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args={"server_settings": {"timezone": "UTC"}},
+    )
+
+engine = make_engine(DATABASE_URL)
+
+# Replicas serve read-only handlers round-robin; unhealthy ones are skipped until
+# the health check sees them answer again, and with none healthy reads go to the primary
+replica_engines = [make_engine(url) for url in DATABASE_REPLICA_URLS]
+replica_healthy = [True] * len(replica_engines)
+_replica_turn = itertools.count()
+_recent_writers = {}
+_listings_written_until = 0.0
+
+# Async session, the only session factory in the app
 SessionLocal = sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False
 )
@@ -20,5 +90,109 @@ Base = declarative_base()
 # Dependency to get the DB session
 async def get_db():
     async with SessionLocal() as session:
-        session.execute("SET timezone = 'UTC'")  # Ensure PostgreSQL operates in UTC
         yield session
+
+
+def pick_replica():
+    for _ in range(len(replica_engines)):
+        index = next(_replica_turn) % len(replica_engines)
+        if replica_healthy[index]:
+            return replica_engines[index]
+    return None
+
+# remember that a user just wrote, so their own reads skip the (possibly lagging) replicas
+def mark_write(user_id: int):
+    now = time.monotonic()
+    # every entry gets the same TTL, so re-inserting keeps the dict ordered by expiry
+    # and expired writers are pruned from the front
+    _recent_writers.pop(user_id, None)
+    _recent_writers[user_id] = now + READ_AFTER_WRITE_SECONDS
+    while True:
+        oldest = next(iter(_recent_writers))
+        if _recent_writers[oldest] >= now:
+            break
+        del _recent_writers[oldest]
+
+def wrote_recently(user_id: int) -> bool:
+    until = _recent_writers.get(user_id)
+    if until is None:
+        return False
+    if until < time.monotonic():
+        del _recent_writers[user_id]
+        return False
+    return True
+
+# Listings are read anonymously, so their readers can't be matched to a writer: after
+# any house write, listing reads stay on the primary for READ_AFTER_WRITE_SECONDS
+def mark_listings_write():
+    global _listings_written_until
+    _listings_written_until = time.monotonic() + READ_AFTER_WRITE_SECONDS
+
+def listings_written_recently() -> bool:
+    return _listings_written_until > time.monotonic()
+
+# session for read-only work, on a replica unless the user needs to read their own writes
+def ReadSession(user_id: Optional[int] = None) -> AsyncSession:
+    bind = None
+    if user_id is None or not wrote_recently(user_id):
+        bind = pick_replica()
+    return SessionLocal(bind=bind or engine)
+
+# Dependency for read-only handlers
+async def get_read_db():
+    async with ReadSession() as session:
+        yield session
+
+# Dependency for the public listing handlers
+async def get_listing_db():
+    bind = None
+    if not listings_written_recently():
+        bind = pick_replica()
+    async with SessionLocal(bind=bind or engine) as session:
+        yield session
+
+
+async def check_replicas():
+    for index, replica in enumerate(replica_engines):
+        try:
+            async with replica.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            healthy = True
+        except Exception:
+            healthy = False
+
+        if healthy != replica_healthy[index]:
+            logging.getLogger("rento.db").warning(
+                "replica %s is now %s", replica.url.host, "healthy" if healthy else "unhealthy"
+            )
+        replica_healthy[index] = healthy
+
+async def monitor_replicas():
+    while True:
+        await check_replicas()
+        await asyncio.sleep(REPLICA_HEALTH_INTERVAL)
+
+
+def _pool_stats(pool):
+    acquired = pool.acquire_count
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        # SQLAlchemy counts overflow from -pool_size, so it is negative until the pool is full
+        "overflow": max(0, pool.overflow()),
+        "acquire_count": acquired,
+        "avg_wait_ms": (pool.total_wait / acquired * 1000) if acquired else 0.0,
+        "max_wait_ms": pool.max_wait * 1000,
+    }
+
+
+# Primary pool stats, then the same stats for each replica under a replica<n>_ prefix
+def pool_stats():
+    stats = _pool_stats(engine.pool)
+    stats["max_overflow"] = DB_MAX_OVERFLOW
+    for index, replica in enumerate(replica_engines):
+        stats.update({f"replica{index}_{name}": value for name, value in _pool_stats(replica.pool).items()})
+    stats["replicas"] = len(replica_engines)
+    stats["replicas_healthy"] = sum(replica_healthy)
+    return stats
@@ -0,0 +1,32 @@
+import csv
+import io
+from database import ReadSession
+
+# rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = 1000
+
+
+def _csv_line(values) -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerow(values)
+    return buf.getvalue()
+
+
+# stream a query as NDJSON or CSV without holding the result set in memory.
+# The generator opens its own session because the request's get_db session is
+# closed before a StreamingResponse body is sent.
+async def stream_export(stmt, schema, fmt: str):
+    fields = list(schema.model_fields)
+
+    if fmt == "csv":
+        yield _csv_line(fields)
+
+    async with ReadSession() as session:
+        rows = await session.stream_scalars(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for row in rows:
+            item = schema.model_validate(row)
+            if fmt == "csv":
+                data = item.model_dump(mode="json")
+                yield _csv_line([data[field] for field in fields])
+            else:
+                yield item.model_dump_json() + "\n"
@@ -0,0 +1,122 @@
+import os
+import asyncio
+import inspect
+import logging
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "1000"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_DELAY = float(os.getenv("JOB_RETRY_DELAY_SECONDS", "1"))
+JOB_SHUTDOWN_TIMEOUT = float(os.getenv("JOB_SHUTDOWN_TIMEOUT_SECONDS", "10"))
+
+logger = logging.getLogger("rento.jobs")
+
+
+# In-process job queue for work that shouldn't hold up a response: a fixed number of
+# worker tasks drain a bounded queue, failed jobs are retried with exponential backoff,
+# and periodic jobs run on their own timers. Sync functions run in a worker thread.
+# Jobs live in memory only, so anything enqueued is lost if the process dies.
+class JobRunner:
+    def __init__(self, workers: int, maxsize: int):
+        self.workers = workers
+        self._queue = asyncio.Queue(maxsize)
+        self._periodic = []
+        self._tasks = []
+        self._periodic_tasks = []
+        self._retries = set()
+        self._counts = {"enqueued": 0, "completed": 0, "retried": 0, "failed": 0, "dropped": 0}
+
+    # queue func(*args) to run in the background; drops the job when the queue is full
+    def enqueue(self, func, *args) -> bool:
+        try:
+            self._queue.put_nowait((func, args, 1))
+        except asyncio.QueueFull:
+            self._counts["dropped"] += 1
+            logger.warning("job queue full, dropping %s", func.__name__)
+            return False
+        self._counts["enqueued"] += 1
+        return True
+
+    # run func every `seconds` while the app is up
+    def every(self, seconds: float, func):
+        self._periodic.append((seconds, func))
+        return func
+
+    async def _call(self, func, args):
+        if inspect.iscoroutinefunction(func):
+            return await func(*args)
+        return await asyncio.to_thread(func, *args)
+
+    async def _retry_later(self, job, delay: float):
+        await asyncio.sleep(delay)
+        await self._queue.put(job)
+
+    async def _worker(self):
+        while True:
+            func, args, attempt = await self._queue.get()
+            try:
+                await self._call(func, args)
+                self._counts["completed"] += 1
+            except Exception:
+                if attempt < JOB_MAX_ATTEMPTS:
+                    self._counts["retried"] += 1
+                    logger.warning("job %s failed (attempt %d), retrying", func.__name__, attempt, exc_info=True)
+                    # the backoff sleeps outside the worker, so it keeps draining the queue
+                    retry = asyncio.create_task(self._retry_later((func, args, attempt + 1), JOB_RETRY_DELAY * 2 ** (attempt - 1)))
+                    self._retries.add(retry)
+                    retry.add_done_callback(self._retries.discard)
+                else:
+                    self._counts["failed"] += 1
+                    logger.exception("job %s failed after %d attempts", func.__name__, attempt)
+            finally:
+                self._queue.task_done()
+
+    async def _every(self, seconds: float, func):
+        while True:
+            await asyncio.sleep(seconds)
+            try:
+                await self._call(func, ())
+            except Exception:
+                logger.exception("periodic job %s failed", func.__name__)
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._periodic_tasks = [asyncio.create_task(self._every(seconds, func)) for seconds, func in self._periodic]
+
+    # stop the timers and pending retries, then give queued jobs a bounded time to finish
+    async def stop(self, timeout: float = JOB_SHUTDOWN_TIMEOUT):
+        for task in [*self._periodic_tasks, *self._retries]:
+            task.cancel()
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("job runner stopped with %d jobs still queued", self._queue.qsize())
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._periodic_tasks, *self._retries, return_exceptions=True)
+
+    def stats(self):
+        return {"workers": self.workers, "queued": self._queue.qsize(), **self._counts}
+
+
+runner = JobRunner(JOB_WORKERS, JOB_QUEUE_SIZE)
+
+
+# queue func(*args) once the session's current transaction commits; dropped on rollback
+def after_commit(db, func, *args):
+    db.sync_session.info.setdefault("after_commit_jobs", []).append((func, args))
+
+
+@event.listens_for(Session, "after_commit")
+def _enqueue_after_commit(session):
+    for func, args in session.info.pop("after_commit_jobs", []):
+        runner.enqueue(func, *args)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("after_commit_jobs", None)
@@ -1,22 +1,51 @@
 from fastapi import FastAPI
-from auth import router as auth_router
+from auth import router as auth_router, user_cache, listing_cache
 from starlette.middleware.sessions import SessionMiddleware
 from dotenv import load_dotenv
 import os
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine, Base
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from database import engine, replica_engines, monitor_replicas, pool_stats
+from metrics import instrument_engine, metrics_middleware, monitor_loop_lag, render_metrics
+from utils import hash_stats
+import asyncio
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from alembic.runtime.migration import MigrationContext
+from uploads import UploadFiles, limit_upload_size
+from jobs import runner
+from maintenance import schedule_maintenance
 
-# Ensure all tables are created based on your models
-async def create_tables():
-    async with engine.begin() as conn:  # Start a new connection
-        await conn.run_sync(Base.metadata.create_all)
+# The schema is owned by the alembic migrations in ./migrations. Startup only
+# compares the database revision with the latest script instead of running create_all.
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+
+async def check_schema_revision():
+    head = ScriptDirectory.from_config(Config(ALEMBIC_INI)).get_current_head()
+
+    async with engine.connect() as conn:
+        current = await conn.run_sync(
+            lambda sync_conn: MigrationContext.configure(sync_conn).get_current_revision()
+        )
+
+    if current != head:
+        raise RuntimeError(
+            f"Database schema is at revision {current}, expected {head}. Run `alembic upgrade head`."
+        )
+
+# Uploads are already-compressed images with Range support, a strong ETag and zero-copy
+# sending, all of which gzip would break, so they bypass compression
+class GZipExceptUploads(GZipMiddleware):
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith("/uploads/"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
 
 app = FastAPI()
 
-# Mounting static files (Modify path if needed)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# Uploaded files are immutable, so they are served with long-lived cache headers
+app.mount("/uploads", UploadFiles(directory="uploads"), name="uploads")
 
 load_dotenv()
 
@@ -39,9 +68,31 @@ app.add_middleware(
 # Add the session middleware
 app.add_middleware(SessionMiddleware, secret_key=os.getenv("SECRET_KEY"))
 
+# Compress large JSON responses (house and booking lists)
+app.add_middleware(GZipExceptUploads, minimum_size=int(os.getenv("GZIP_MIN_SIZE", "1024")))
+
+# Refuse oversized uploads before their body is read
+app.middleware("http")(limit_upload_size)
+
+# Per-route request metrics and per-request SQL accounting
+instrument_engine(engine)
+for replica in replica_engines:
+    instrument_engine(replica)
+app.middleware("http")(metrics_middleware)
+
 @app.on_event("startup")
 async def startup():
-    await create_tables()  # Create tables when the app starts
+    await check_schema_revision()  # Refuse to serve against an outdated schema
+    app.state.loop_lag_task = asyncio.create_task(monitor_loop_lag())
+    if replica_engines:
+        app.state.replica_health_task = asyncio.create_task(monitor_replicas())
+    schedule_maintenance(runner)
+    runner.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    # let queued jobs finish before the process exits
+    await runner.stop()
 
 app.include_router(auth_router)
 
@@ -49,11 +100,12 @@ app.include_router(auth_router)
 async def root():
     return {"message": "Hello World"}
 
-# Endpoint to serve profile pictures directly
-@app.get("/uploads/profile_pictures/{filename}")
-async def get_profile_picture(filename: str):
-    file_path = f"app/uploads/profile_pictures/{filename}"
-    if os.path.exists(file_path):
-        print(file_path)
-        return FileResponse(file_path)
-    return {"error": "File not found"}
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    gauges = {f"db_pool_{name}": value for name, value in pool_stats().items()}
+    gauges.update({f"user_cache_{name}": value for name, value in user_cache.stats().items()})
+    gauges.update({f"listing_cache_{name}": value for name, value in listing_cache.stats().items()})
+    gauges.update({f"password_hash_{name}": value for name, value in hash_stats().items()})
+    gauges.update({f"jobs_{name}": value for name, value in runner.stats().items()})
+    return render_metrics(gauges)
@@ -0,0 +1,119 @@
+import os
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import delete, select, text, update
+from database import SessionLocal
+from models import Booking, House, IdempotencyKey, User
+from occupancy import update_calendars
+from auth import publish_booking_event
+from uploads import PROFILE_PICTURE_DIR, list_uploads, remove_stale_upload
+
+PENDING_BOOKING_TTL = timedelta(hours=float(os.getenv("PENDING_BOOKING_TTL_HOURS", "48")))
+IDEMPOTENCY_KEY_TTL = timedelta(hours=float(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24")))
+MAINTENANCE_INTERVAL = float(os.getenv("MAINTENANCE_INTERVAL_SECONDS", "300"))
+MAINTENANCE_BATCH_SIZE = int(os.getenv("MAINTENANCE_BATCH_SIZE", "1000"))
+BOOKING_PARTITION_MONTHS_AHEAD = int(os.getenv("BOOKING_PARTITION_MONTHS_AHEAD", "12"))
+BOOKING_RETENTION_MONTHS = int(os.getenv("BOOKING_RETENTION_MONTHS", "12"))
+PARTITION_MAINTENANCE_INTERVAL = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL_SECONDS", "3600"))
+UPLOAD_SWEEP_INTERVAL = float(os.getenv("UPLOAD_SWEEP_INTERVAL_SECONDS", "3600"))
+
+logger = logging.getLogger("rento.jobs")
+
+
+# Cancel pending bookings nobody acted on within PENDING_BOOKING_TTL, so they stop
+# blocking the dates. Each batch is one UPDATE; SKIP LOCKED lets several app processes
+# run this concurrently and leaves rows alone that an owner is confirming right now.
+async def expire_pending_bookings():
+    cutoff = datetime.utcnow() - PENDING_BOOKING_TTL
+    while True:
+        async with SessionLocal() as db:
+            stale = (
+                select(Booking.id)
+                .filter(Booking.status == 'pending', Booking.created_at < cutoff)
+                .order_by(Booking.id)
+                .limit(MAINTENANCE_BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+            )
+            owner_id = select(House.user_id).where(House.id == Booking.house_id).scalar_subquery()
+            stmt = (
+                update(Booking)
+                .where(Booking.id.in_(stale.scalar_subquery()))
+                .values(status='cancel')
+                .returning(Booking, owner_id)
+                .execution_options(synchronize_session=False)
+            )
+            result = await db.execute(stmt)
+            expired = result.all()
+            await update_calendars(db, [booking for booking, _ in expired], 'cancel')
+            await db.commit()
+
+        for booking, owner_id in expired:
+            publish_booking_event("booking.cancel", booking, booking.user_id, owner_id)
+        if expired:
+            logger.info("expired %d pending bookings", len(expired))
+        if len(expired) < MAINTENANCE_BATCH_SIZE:
+            return
+
+
+# idempotency keys only need to outlive client retries
+async def purge_idempotency_keys():
+    cutoff = datetime.utcnow() - IDEMPOTENCY_KEY_TTL
+    async with SessionLocal() as db:
+        result = await db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff))
+        await db.commit()
+
+    if result.rowcount:
+        logger.info("purged %d idempotency keys", result.rowcount)
+
+
+# Keep monthly bookings partitions created ahead of time, and move partitions whose stays
+# all ended more than BOOKING_RETENTION_MONTHS ago to the booking_archive schema.
+# Both only lock the bookings table when a partition is actually added or detached.
+async def manage_booking_partitions():
+    async with SessionLocal() as db:
+        # give up rather than queue every booking query behind the partition lock
+        await db.execute(text("SET LOCAL lock_timeout = '5s'"))
+        created = await db.scalar(
+            text("SELECT create_booking_partitions(current_date, (current_date + make_interval(months => :ahead))::date)"),
+            {"ahead": BOOKING_PARTITION_MONTHS_AHEAD},
+        )
+        result = await db.scalars(
+            text("SELECT archive_booking_partitions(now() - make_interval(months => :months))"),
+            {"months": BOOKING_RETENTION_MONTHS},
+        )
+        archived = result.all()
+        await db.commit()
+
+    if created:
+        logger.info("created %d bookings partitions", created)
+    if archived:
+        logger.info("archived bookings partitions %s", ", ".join(archived))
+
+
+# Delete profile pictures no profile points at any more. Uploads are deduplicated, so a
+# file may be picked up again by an upload that hasn't committed yet; save_upload refreshes
+# the mtime of a file it reuses, and the mtime is read only after the reference check, so
+# such a file is always inside the grace window here.
+async def remove_unused_uploads():
+    paths = await asyncio.to_thread(list_uploads, PROFILE_PICTURE_DIR)
+    removed = 0
+    for start in range(0, len(paths), MAINTENANCE_BATCH_SIZE):
+        batch = paths[start:start + MAINTENANCE_BATCH_SIZE]
+        async with SessionLocal() as db:
+            result = await db.scalars(select(User.profile_picture).where(User.profile_picture.in_(batch)))
+            used = set(result.all())
+
+        for path in batch:
+            if path not in used and await asyncio.to_thread(remove_stale_upload, path):
+                removed += 1
+
+    if removed:
+        logger.info("removed %d unused uploads", removed)
+
+
+def schedule_maintenance(runner):
+    runner.every(MAINTENANCE_INTERVAL, expire_pending_bookings)
+    runner.every(MAINTENANCE_INTERVAL, purge_idempotency_keys)
+    runner.every(PARTITION_MAINTENANCE_INTERVAL, manage_booking_partitions)
+    runner.every(UPLOAD_SWEEP_INTERVAL, remove_unused_uploads)
@@ -0,0 +1,139 @@
+import os
+import time
+import asyncio
+import logging
+from contextvars import ContextVar
+from sqlalchemy import event
+from fastapi import Request, Response
+
+logger = logging.getLogger("rento.sql")
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+LOOP_LAG_INTERVAL = 0.5
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SQL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += 1
+        self.sum += value
+
+    def render(self, name: str, labels: str):
+        lines = []
+        for bound, count in zip(self.buckets, self.counts):
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.total}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.total}")
+        return lines
+
+
+# per (method, route) series
+request_counts = {}
+request_latency = {}
+request_sql_count = {}
+request_db_time = {}
+slow_queries = 0
+loop_lag = {"last": 0.0, "max": 0.0}
+
+# SQL statements and DB time of the request being handled. Holds a mutable dict so
+# updates made inside SQLAlchemy's greenlets and child tasks land on the same object.
+current_sql = ContextVar("current_sql", default=None)
+
+
+def instrument_engine(engine):
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        global slow_queries
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+
+        stats = current_sql.get()
+        if stats is not None:
+            stats["count"] += 1
+            stats["time"] += elapsed
+
+        if elapsed * 1000 >= SLOW_QUERY_MS:
+            slow_queries += 1
+            logger.warning("slow query (%.1f ms): %s", elapsed * 1000, statement)
+
+
+async def metrics_middleware(request: Request, call_next):
+    stats = {"count": 0, "time": 0.0}
+    current_sql.set(stats)
+    start = time.perf_counter()
+
+    response = await call_next(request)
+
+    elapsed = time.perf_counter() - start
+    # label by route template, so /houses/1 and /houses/2 share one series
+    route = request.scope.get("route")
+    key = (request.method, route.path if route else "unmatched", str(response.status_code))
+    series = key[:2]
+
+    request_counts[key] = request_counts.get(key, 0) + 1
+    request_latency.setdefault(series, Histogram(LATENCY_BUCKETS)).observe(elapsed)
+    request_sql_count.setdefault(series, Histogram(SQL_COUNT_BUCKETS)).observe(stats["count"])
+    request_db_time.setdefault(series, Histogram(LATENCY_BUCKETS)).observe(stats["time"])
+
+    response.headers["X-SQL-Queries"] = str(stats["count"])
+    response.headers["Server-Timing"] = f"db;dur={stats['time'] * 1000:.1f}, app;dur={elapsed * 1000:.1f}"
+    return response
+
+
+# how late the event loop wakes up from a fixed sleep; anything blocking the loop shows up here
+async def monitor_loop_lag():
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        lag = max(0.0, time.perf_counter() - start - LOOP_LAG_INTERVAL)
+        loop_lag["last"] = lag
+        loop_lag["max"] = max(loop_lag["max"], lag)
+
+
+def _labels(method: str, route: str) -> str:
+    return f'method="{method}",route="{route}"'
+
+
+def render_metrics(gauges: dict) -> Response:
+    lines = ["# TYPE http_requests_total counter"]
+    for (method, route, code), count in sorted(request_counts.items()):
+        lines.append(f'http_requests_total{{{_labels(method, route)},status="{code}"}} {count}')
+
+    for name, series in (
+        ("http_request_duration_seconds", request_latency),
+        ("http_request_sql_statements", request_sql_count),
+        ("http_request_db_seconds", request_db_time),
+    ):
+        lines.append(f"# TYPE {name} histogram")
+        for (method, route), histogram in sorted(series.items()):
+            lines.extend(histogram.render(name, _labels(method, route)))
+
+    lines.append("# TYPE db_slow_queries_total counter")
+    lines.append(f"db_slow_queries_total {slow_queries}")
+    lines.append("# TYPE event_loop_lag_seconds gauge")
+    lines.append(f"event_loop_lag_seconds {loop_lag['last']}")
+    lines.append("# TYPE event_loop_lag_max_seconds gauge")
+    lines.append(f"event_loop_lag_max_seconds {loop_lag['max']}")
+
+    for name, value in gauges.items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+
+    return Response("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
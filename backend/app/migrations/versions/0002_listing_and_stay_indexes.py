@@ -0,0 +1,47 @@
+"""listing keyset indexes and booking stay interval
+
+Revision ID: 0002_listing_and_stay_indexes
+Revises: 0001_initial
+Create Date: 2026-10-18 09:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_listing_and_stay_indexes'
+down_revision: Union[str, None] = '0001_initial'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_houses_created_at_id', 'houses', ['created_at', 'id'], unique=False)
+    op.create_index('ix_houses_location_created_at_id', 'houses', ['location', 'created_at', 'id'], unique=False)
+    op.create_index('ix_houses_user_id_created_at_id', 'houses', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_houses_price_created_at_id', 'houses', ['price', 'created_at', 'id'], unique=False)
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.add_column(
+        'bookings',
+        sa.Column(
+            'stay',
+            postgresql.TSTZRANGE(),
+            sa.Computed("tstzrange(check_in, check_out, '[)')", persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_index('ix_bookings_house_id_stay', 'bookings', ['house_id', 'stay'], unique=False, postgresql_using='gist')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bookings_house_id_stay', table_name='bookings', postgresql_using='gist')
+    op.drop_column('bookings', 'stay')
+    op.drop_index('ix_houses_price_created_at_id', table_name='houses')
+    op.drop_index('ix_houses_user_id_created_at_id', table_name='houses')
+    op.drop_index('ix_houses_location_created_at_id', table_name='houses')
+    op.drop_index('ix_houses_created_at_id', table_name='houses')
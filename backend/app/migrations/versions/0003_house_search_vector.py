@@ -0,0 +1,42 @@
+"""house full-text search vector
+
+Revision ID: 0003_house_search_vector
+Revises: 0002_listing_and_stay_indexes
+Create Date: 2026-10-18 09:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_house_search_vector'
+down_revision: Union[str, None] = '0002_listing_and_stay_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'houses',
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+                "setweight(to_tsvector('english', coalesce(location, '')), 'B') || "
+                "setweight(to_tsvector('english', coalesce(description, '')), 'C')",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index('ix_houses_search_vector', 'houses', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_houses_search_vector', table_name='houses', postgresql_using='gin')
+    op.drop_column('houses', 'search_vector')
@@ -0,0 +1,52 @@
+"""booking overlap exclusion constraint and idempotency keys
+
+Revision ID: 0004_booking_exclusion
+Revises: 0003_house_search_vector
+Create Date: 2026-10-18 09:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_booking_exclusion'
+down_revision: Union[str, None] = '0003_house_search_vector'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # fails if active bookings already overlap; resolve those before upgrading
+    op.drop_index('ix_bookings_house_id_stay', table_name='bookings', postgresql_using='gist')
+    op.create_exclude_constraint(
+        'ex_bookings_house_id_stay',
+        'bookings',
+        ('house_id', '='),
+        ('stay', '&&'),
+        using='gist',
+        where="status <> 'cancel'",
+    )
+
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('key', sa.String(length=255), nullable=False),
+        sa.Column('endpoint', sa.String(), nullable=False),
+        sa.Column('status_code', sa.Integer(), nullable=False),
+        sa.Column('response', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id', 'key'),
+    )
+    op.create_index(op.f('ix_idempotency_keys_created_at'), 'idempotency_keys', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_idempotency_keys_created_at'), table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
+    op.drop_constraint('ex_bookings_house_id_stay', 'bookings')
+    op.create_index('ix_bookings_house_id_stay', 'bookings', ['house_id', 'stay'], unique=False, postgresql_using='gist')
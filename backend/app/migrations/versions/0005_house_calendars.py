@@ -0,0 +1,52 @@
+"""precomputed house occupancy calendars
+
+Revision ID: 0005_house_calendars
+Revises: 0004_booking_exclusion
+Create Date: 2026-10-18 09:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005_house_calendars'
+down_revision: Union[str, None] = '0004_booking_exclusion'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'house_calendars',
+        sa.Column('house_id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('booked', sa.Integer(), nullable=False),
+        sa.Column('pending', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['house_id'], ['houses.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('house_id', 'month'),
+    )
+
+    # backfill from active bookings, one bit per booked night (UTC dates)
+    op.execute("""
+        INSERT INTO house_calendars (house_id, month, booked, pending)
+        SELECT
+            house_id,
+            date_trunc('month', night)::date,
+            bit_or(CASE WHEN status = 'confirm' THEN 1 << (extract(day FROM night)::int - 1) ELSE 0 END),
+            bit_or(CASE WHEN status <> 'confirm' THEN 1 << (extract(day FROM night)::int - 1) ELSE 0 END)
+        FROM bookings,
+            generate_series(
+                (check_in AT TIME ZONE 'UTC')::date,
+                (check_out AT TIME ZONE 'UTC')::date - 1,
+                interval '1 day'
+            ) AS night
+        WHERE status <> 'cancel'
+        GROUP BY 1, 2
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('house_calendars')
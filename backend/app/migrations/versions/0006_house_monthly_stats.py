@@ -0,0 +1,88 @@
+"""incrementally maintained owner report aggregates
+
+Revision ID: 0006_house_monthly_stats
+Revises: 0005_house_calendars
+Create Date: 2026-10-18 09:25:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006_house_monthly_stats'
+down_revision: Union[str, None] = '0005_house_calendars'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'house_monthly_stats',
+        sa.Column('house_id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('nights', sa.Integer(), nullable=False),
+        sa.Column('bookings', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['house_id'], ['houses.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('house_id', 'month', 'status'),
+    )
+
+    # Add (sign = 1) or remove (sign = -1) one booking: its nights split by UTC month,
+    # and the booking itself counted in its check-in month.
+    op.execute("""
+        CREATE FUNCTION apply_booking_stats(
+            p_house_id integer, p_status text, p_check_in timestamptz, p_check_out timestamptz, p_sign integer
+        ) RETURNS void LANGUAGE sql AS $$
+            INSERT INTO house_monthly_stats AS s (house_id, month, status, nights, bookings)
+            SELECT
+                p_house_id,
+                m.month,
+                coalesce(p_status, 'pending'),
+                p_sign * sum(m.nights)::integer,
+                CASE WHEN m.month = date_trunc('month', p_check_in AT TIME ZONE 'UTC')::date THEN p_sign ELSE 0 END
+            FROM (
+                SELECT date_trunc('month', night)::date AS month, 1 AS nights
+                FROM generate_series(
+                    (p_check_in AT TIME ZONE 'UTC')::date,
+                    (p_check_out AT TIME ZONE 'UTC')::date - 1,
+                    interval '1 day'
+                ) AS night
+                UNION ALL
+                SELECT date_trunc('month', p_check_in AT TIME ZONE 'UTC')::date, 0
+            ) m
+            WHERE p_house_id IS NOT NULL AND p_check_in IS NOT NULL AND p_check_out IS NOT NULL
+            GROUP BY m.month
+            ON CONFLICT (house_id, month, status) DO UPDATE
+            SET nights = s.nights + excluded.nights, bookings = s.bookings + excluded.bookings
+        $$
+    """)
+    op.execute("""
+        CREATE FUNCTION bookings_stats_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM apply_booking_stats(OLD.house_id, OLD.status, OLD.check_in, OLD.check_out, -1);
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM apply_booking_stats(NEW.house_id, NEW.status, NEW.check_in, NEW.check_out, 1);
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER bookings_stats
+        AFTER INSERT OR DELETE OR UPDATE OF house_id, status, check_in, check_out ON bookings
+        FOR EACH ROW EXECUTE FUNCTION bookings_stats_trigger()
+    """)
+
+    op.execute("SELECT apply_booking_stats(house_id, status, check_in, check_out, 1) FROM bookings")
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER bookings_stats ON bookings")
+    op.execute("DROP FUNCTION bookings_stats_trigger()")
+    op.execute("DROP FUNCTION apply_booking_stats(integer, text, timestamptz, timestamptz, integer)")
+    op.drop_table('house_monthly_stats')
@@ -0,0 +1,25 @@
+"""index users.profile_picture for upload garbage collection
+
+Revision ID: 0007_user_profile_picture_index
+Revises: 0006_house_monthly_stats
+Create Date: 2026-10-18 12:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007_user_profile_picture_index'
+down_revision: Union[str, None] = '0006_house_monthly_stats'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_users_profile_picture', 'users', ['profile_picture'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_profile_picture', table_name='users')
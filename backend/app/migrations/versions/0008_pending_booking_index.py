@@ -0,0 +1,29 @@
+"""partial index on pending bookings by age
+
+Revision ID: 0008_pending_booking_index
+Revises: 0007_user_profile_picture_index
+Create Date: 2026-10-18 13:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008_pending_booking_index'
+down_revision: Union[str, None] = '0007_user_profile_picture_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_bookings_pending_created_at', 'bookings', ['created_at'], unique=False,
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bookings_pending_created_at', table_name='bookings')
@@ -0,0 +1,250 @@
+"""range-partition bookings by check_in month
+
+Revision ID: 0009_partition_bookings
+Revises: 0008_pending_booking_index
+Create Date: 2026-10-18 14:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009_partition_bookings'
+down_revision: Union[str, None] = '0008_pending_booking_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BOOKING_COLUMNS = "id, house_id, user_id, check_in, check_out, status, created_at"
+
+# Monthly partitions are named bookings_YYYY_MM. Rows already sitting in the default
+# partition for a new month are moved into it; the stats trigger counts them out on the
+# delete, so they are counted back in once the partition is attached.
+CREATE_PARTITIONS_SQL = """
+    CREATE FUNCTION create_booking_partitions(first_month date, last_month date) RETURNS integer
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        part_month date := date_trunc('month', first_month)::date;
+        lower_bound timestamptz;
+        upper_bound timestamptz;
+        part text;
+        created integer := 0;
+    BEGIN
+        PERFORM pg_advisory_xact_lock(hashtext('booking_partitions'));
+        WHILE part_month <= last_month LOOP
+            part := 'bookings_' || to_char(part_month, 'YYYY_MM');
+            lower_bound := part_month::timestamp AT TIME ZONE 'UTC';
+            upper_bound := (part_month + interval '1 month')::timestamp AT TIME ZONE 'UTC';
+
+            IF to_regclass(part) IS NULL THEN
+                IF EXISTS (SELECT 1 FROM bookings_default WHERE check_in >= lower_bound AND check_in < upper_bound) THEN
+                    EXECUTE format('CREATE TABLE %I (LIKE bookings INCLUDING DEFAULTS INCLUDING GENERATED)', part);
+                    EXECUTE format(
+                        'INSERT INTO %I (%s) SELECT %s FROM bookings_default WHERE check_in >= $1 AND check_in < $2',
+                        part, '""" + BOOKING_COLUMNS + """', '""" + BOOKING_COLUMNS + """'
+                    ) USING lower_bound, upper_bound;
+                    DELETE FROM bookings_default WHERE check_in >= lower_bound AND check_in < upper_bound;
+                    EXECUTE format('ALTER TABLE bookings ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)', part, lower_bound, upper_bound);
+                    EXECUTE format(
+                        'SELECT apply_booking_stats(house_id, status, check_in, check_out, 1) FROM %I', part
+                    );
+                ELSE
+                    EXECUTE format('CREATE TABLE %I PARTITION OF bookings FOR VALUES FROM (%L) TO (%L)', part, lower_bound, upper_bound);
+                END IF;
+                created := created + 1;
+            END IF;
+            part_month := (part_month + interval '1 month')::date;
+        END LOOP;
+        RETURN created;
+    END
+    $$
+"""
+
+# Detach monthly partitions whose stays all ended before the cutoff and move them to the
+# booking_archive schema. Archived rows keep their house_monthly_stats contribution;
+# their foreign keys are dropped so houses and users can still be deleted.
+ARCHIVE_PARTITIONS_SQL = """
+    CREATE FUNCTION archive_booking_partitions(cutoff timestamptz) RETURNS SETOF text
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        part record;
+        fk record;
+        still_active boolean;
+    BEGIN
+        PERFORM pg_advisory_xact_lock(hashtext('booking_partitions'));
+        FOR part IN
+            SELECT c.oid::regclass AS rel, c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'bookings'::regclass AND c.relname ~ '^bookings_[0-9]{4}_[0-9]{2}$'
+            ORDER BY c.relname
+        LOOP
+            EXIT WHEN to_date(substr(part.relname, 10), 'YYYY_MM') + interval '1 month' > cutoff;
+
+            EXECUTE format('SELECT EXISTS (SELECT 1 FROM %s WHERE check_out >= $1)', part.rel)
+                INTO still_active USING cutoff;
+            CONTINUE WHEN still_active;
+
+            EXECUTE format('ALTER TABLE bookings DETACH PARTITION %s', part.rel);
+            FOR fk IN SELECT conname FROM pg_constraint WHERE conrelid = part.rel AND contype = 'f' LOOP
+                EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', part.rel, fk.conname);
+            END LOOP;
+            EXECUTE format('ALTER TABLE %s SET SCHEMA booking_archive', part.rel);
+            RETURN NEXT part.relname;
+        END LOOP;
+    END
+    $$
+"""
+
+# Replaces the exclusion constraint, which postgres can't enforce across partitions.
+# The advisory lock serializes writers per house, so the overlap check can't race.
+NO_OVERLAP_SQL = """
+    CREATE FUNCTION bookings_no_overlap() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF NEW.status = 'cancel' OR NEW.house_id IS NULL THEN
+            RETURN NEW;
+        END IF;
+
+        PERFORM pg_advisory_xact_lock(hashtext('bookings'), NEW.house_id);
+        IF EXISTS (
+            SELECT 1 FROM bookings
+            WHERE house_id = NEW.house_id
+              AND id <> NEW.id
+              AND status <> 'cancel'
+              AND check_in < NEW.check_out
+              AND stay && tstzrange(NEW.check_in, NEW.check_out, '[)')
+        ) THEN
+            RAISE EXCEPTION 'booking overlaps an active booking of house %', NEW.house_id
+                USING ERRCODE = 'exclusion_violation', CONSTRAINT = 'ex_bookings_house_id_stay';
+        END IF;
+        RETURN NEW;
+    END
+    $$
+"""
+
+STATS_TRIGGER_SQL = """
+    CREATE TRIGGER bookings_stats
+    AFTER INSERT OR DELETE OR UPDATE OF house_id, status, check_in, check_out ON bookings
+    FOR EACH ROW EXECUTE FUNCTION bookings_stats_trigger()
+"""
+
+
+def upgrade() -> None:
+    # every booking needs a check_in now that it is the partition key
+    op.execute("ALTER TABLE bookings RENAME TO bookings_unpartitioned")
+    op.execute("DROP TRIGGER bookings_stats ON bookings_unpartitioned")
+    op.drop_constraint('ex_bookings_house_id_stay', 'bookings_unpartitioned')
+    op.drop_index('ix_bookings_pending_created_at', table_name='bookings_unpartitioned')
+    op.drop_index('ix_bookings_id', table_name='bookings_unpartitioned')
+    op.drop_constraint('bookings_pkey', 'bookings_unpartitioned')
+
+    op.create_table(
+        'bookings',
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('bookings_id_seq'::regclass)"), nullable=False),
+        sa.Column('house_id', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('check_in', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('check_out', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column(
+            'stay',
+            postgresql.TSTZRANGE(),
+            sa.Computed("tstzrange(check_in, check_out, '[)')", persisted=True),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(['house_id'], ['houses.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id', 'check_in'),
+        postgresql_partition_by='RANGE (check_in)',
+    )
+    op.execute("CREATE TABLE bookings_default PARTITION OF bookings DEFAULT")
+    op.execute("CREATE SCHEMA IF NOT EXISTS booking_archive")
+    op.execute(CREATE_PARTITIONS_SQL)
+    op.execute(ARCHIVE_PARTITIONS_SQL)
+    op.execute("""
+        SELECT create_booking_partitions(
+            coalesce((SELECT min(check_in) AT TIME ZONE 'UTC' FROM bookings_unpartitioned)::date, current_date),
+            (current_date + interval '12 months')::date
+        )
+    """)
+
+    # existing rows already satisfy the exclusion constraint and are already counted in
+    # house_monthly_stats, so they are copied before the triggers exist
+    op.execute(f"INSERT INTO bookings ({BOOKING_COLUMNS}) SELECT {BOOKING_COLUMNS} FROM bookings_unpartitioned")
+    op.execute("ALTER SEQUENCE bookings_id_seq OWNED BY bookings.id")
+    op.drop_table('bookings_unpartitioned')
+
+    op.create_index('ix_bookings_id', 'bookings', ['id'], unique=False)
+    op.create_index(
+        'ix_bookings_house_id_stay', 'bookings', ['house_id', 'stay'], unique=False,
+        postgresql_using='gist', postgresql_where=sa.text("status <> 'cancel'"),
+    )
+    op.create_index(
+        'ix_bookings_pending_created_at', 'bookings', ['created_at'], unique=False,
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+    op.execute(NO_OVERLAP_SQL)
+    op.execute("""
+        CREATE TRIGGER bookings_no_overlap
+        BEFORE INSERT OR UPDATE OF house_id, status, check_in, check_out ON bookings
+        FOR EACH ROW EXECUTE FUNCTION bookings_no_overlap()
+    """)
+    op.execute(STATS_TRIGGER_SQL)
+
+
+def downgrade() -> None:
+    # archived partitions are left in booking_archive
+    op.execute("ALTER TABLE bookings RENAME TO bookings_partitioned")
+    op.execute("DROP TRIGGER bookings_stats ON bookings_partitioned")
+    op.execute("DROP TRIGGER bookings_no_overlap ON bookings_partitioned")
+    op.execute("DROP FUNCTION bookings_no_overlap()")
+    op.execute("DROP FUNCTION archive_booking_partitions(timestamptz)")
+    op.execute("DROP FUNCTION create_booking_partitions(date, date)")
+    op.drop_index('ix_bookings_pending_created_at', table_name='bookings_partitioned')
+    op.drop_index('ix_bookings_house_id_stay', table_name='bookings_partitioned')
+    op.drop_index('ix_bookings_id', table_name='bookings_partitioned')
+    op.drop_constraint('bookings_pkey', 'bookings_partitioned')
+
+    op.create_table(
+        'bookings',
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('bookings_id_seq'::regclass)"), nullable=False),
+        sa.Column('house_id', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('check_in', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('check_out', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column(
+            'stay',
+            postgresql.TSTZRANGE(),
+            sa.Computed("tstzrange(check_in, check_out, '[)')", persisted=True),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(['house_id'], ['houses.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.execute(f"INSERT INTO bookings ({BOOKING_COLUMNS}) SELECT {BOOKING_COLUMNS} FROM bookings_partitioned")
+    op.execute("ALTER SEQUENCE bookings_id_seq OWNED BY bookings.id")
+    op.drop_table('bookings_partitioned')
+
+    op.create_index('ix_bookings_id', 'bookings', ['id'], unique=False)
+    op.create_index(
+        'ix_bookings_pending_created_at', 'bookings', ['created_at'], unique=False,
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+    op.create_exclude_constraint(
+        'ex_bookings_house_id_stay',
+        'bookings',
+        ('house_id', '='),
+        ('stay', '&&'),
+        using='gist',
+        where="status <> 'cancel'",
+    )
+    op.execute(STATS_TRIGGER_SQL)
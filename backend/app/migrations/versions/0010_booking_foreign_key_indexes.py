@@ -0,0 +1,28 @@
+"""index bookings foreign keys together with check_in
+
+Revision ID: 0010_booking_foreign_key_indexes
+Revises: 0009_partition_bookings
+Create Date: 2026-10-18 15:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010_booking_foreign_key_indexes'
+down_revision: Union[str, None] = '0009_partition_bookings'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# houses.user_id is already the leading column of ix_houses_user_id_created_at_id
+def upgrade() -> None:
+    op.create_index('ix_bookings_house_id_check_in', 'bookings', ['house_id', 'check_in'], unique=False)
+    op.create_index('ix_bookings_user_id_check_in', 'bookings', ['user_id', 'check_in'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bookings_user_id_check_in', table_name='bookings')
+    op.drop_index('ix_bookings_house_id_check_in', table_name='bookings')
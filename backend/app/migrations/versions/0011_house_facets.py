@@ -0,0 +1,75 @@
+"""incrementally maintained listing facet counts
+
+Revision ID: 0011_house_facets
+Revises: 0010_booking_foreign_key_indexes
+Create Date: 2026-10-18 16:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011_house_facets'
+down_revision: Union[str, None] = '0010_booking_foreign_key_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'house_facets',
+        sa.Column('location', sa.String(), nullable=False),
+        sa.Column('price_band', sa.Integer(), nullable=False),
+        sa.Column('houses', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('location', 'price_band'),
+    )
+
+    # Add (sign = 1) or remove (sign = -1) one house from its location and price band.
+    # The band bounds must match models.PRICE_BANDS.
+    op.execute("""
+        CREATE FUNCTION apply_house_facet(p_location text, p_price double precision, p_sign integer)
+        RETURNS void LANGUAGE sql AS $$
+            INSERT INTO house_facets AS f (location, price_band, houses)
+            VALUES (
+                coalesce(p_location, ''),
+                width_bucket(coalesce(p_price, 0), ARRAY[50, 100, 200, 500]::double precision[]),
+                p_sign
+            )
+            ON CONFLICT (location, price_band) DO UPDATE SET houses = f.houses + excluded.houses
+        $$
+    """)
+    op.execute("""
+        CREATE FUNCTION houses_facets_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM apply_house_facet(OLD.location, OLD.price, -1);
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM apply_house_facet(NEW.location, NEW.price, 1);
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER houses_facets
+        AFTER INSERT OR DELETE OR UPDATE OF location, price ON houses
+        FOR EACH ROW EXECUTE FUNCTION houses_facets_trigger()
+    """)
+
+    op.execute("""
+        INSERT INTO house_facets (location, price_band, houses)
+        SELECT coalesce(location, ''), width_bucket(coalesce(price, 0), ARRAY[50, 100, 200, 500]::double precision[]), count(*)
+        FROM houses
+        GROUP BY 1, 2
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER houses_facets ON houses")
+    op.execute("DROP FUNCTION houses_facets_trigger()")
+    op.execute("DROP FUNCTION apply_house_facet(text, double precision, integer)")
+    op.drop_table('house_facets')
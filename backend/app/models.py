@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, Index, Computed, DDL, event, text
+from sqlalchemy.dialects.postgresql import TSTZRANGE, TSVECTOR, JSONB
 from database import Base 
 from sqlalchemy import ForeignKey
 from sqlalchemy.orm import relationship
@@ -12,7 +13,7 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True)
     username = Column(String)
-    profile_picture = Column(String)
+    profile_picture = Column(String, index=True)
     google_id = Column(String, unique=True)
     password = Column(String)
     role = Column(String)
@@ -22,6 +23,12 @@ class User(Base):
 
 
 
+HOUSE_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(location, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+)
+
 class House(Base):
     __tablename__ = "houses"
 
@@ -33,23 +40,112 @@ class House(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # weighted full-text document maintained by postgres: title > location > description
+    search_vector = Column(TSVECTOR, Computed(HOUSE_SEARCH_VECTOR, persisted=True))
 
     user = relationship("User", back_populates="houses")
     bookings = relationship("Booking", back_populates="house")
 
+    # composite indexes backing keyset pagination on (created_at, id) and the listing filters
+    __table_args__ = (
+        Index("ix_houses_created_at_id", "created_at", "id"),
+        Index("ix_houses_location_created_at_id", "location", "created_at", "id"),
+        Index("ix_houses_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_houses_price_created_at_id", "price", "created_at", "id"),
+        Index("ix_houses_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
 
 
 
 class Booking(Base):
     __tablename__ = "bookings"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     house_id = Column(Integer, ForeignKey("houses.id"))
     user_id = Column(Integer, ForeignKey("users.id"))
-    check_in = Column(DateTime(timezone=True))
+    # partition key, so it is part of the table's primary key (see migration 0009)
+    check_in = Column(DateTime(timezone=True), primary_key=True)
     check_out = Column(DateTime(timezone=True))
     status = Column(String, default='pending')
     created_at = Column(DateTime, default=datetime.utcnow)
+    # half-open [check_in, check_out) interval kept in sync by postgres
+    stay = Column(TSTZRANGE, Computed("tstzrange(check_in, check_out, '[)')", persisted=True))
 
     house = relationship("House", back_populates="bookings")
-    user = relationship("User", back_populates="bookings")
\ No newline at end of file
+    user = relationship("User", back_populates="bookings")
+
+    # Range-partitioned by check_in month. No two active bookings of a house may overlap;
+    # exclusion constraints can't span partitions, so the bookings_no_overlap trigger
+    # enforces that, using the GiST index on (house_id, stay) like availability searches do.
+    __table_args__ = (
+        Index(
+            "ix_bookings_house_id_stay", "house_id", "stay",
+            postgresql_using="gist",
+            postgresql_where=text("status <> 'cancel'"),
+        ),
+        # pending bookings by age, for the expiry job
+        Index("ix_bookings_pending_created_at", "created_at", postgresql_where=text("status = 'pending'")),
+        # foreign keys, with check_in for "by house/user and date" filters and pruning
+        Index("ix_bookings_house_id_check_in", "house_id", "check_in"),
+        Index("ix_bookings_user_id_check_in", "user_id", "check_in"),
+        {"postgresql_partition_by": "RANGE (check_in)"},
+    )
+    # rows are still identified by id alone
+    __mapper_args__ = {"primary_key": [id]}
+
+
+class HouseCalendar(Base):
+    __tablename__ = "house_calendars"
+
+    # one row per house and month; bit d-1 is the night starting on day d (see occupancy.py)
+    house_id = Column(Integer, ForeignKey("houses.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(Date, primary_key=True)
+    booked = Column(Integer, nullable=False, default=0)
+    pending = Column(Integer, nullable=False, default=0)
+
+
+class HouseMonthlyStats(Base):
+    __tablename__ = "house_monthly_stats"
+
+    # Booked nights and bookings per house, month and status. Maintained by the
+    # bookings_stats trigger (migration 0006) on every booking insert/update/delete.
+    house_id = Column(Integer, ForeignKey("houses.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(Date, primary_key=True)
+    status = Column(String, primary_key=True)
+    nights = Column(Integer, nullable=False, default=0)
+    bookings = Column(Integer, nullable=False, default=0)
+
+
+# Upper bounds of the listing price bands: band 0 is below 50, band 4 is 500 and up.
+# Matches postgres width_bucket(price, ARRAY[...]) as used by migration 0011.
+PRICE_BANDS = [50, 100, 200, 500]
+
+class HouseFacet(Base):
+    __tablename__ = "house_facets"
+
+    # Houses per location and price band, for the browse page facets. Maintained by
+    # the houses_facets trigger (migration 0011) on every house insert/update/delete.
+    location = Column(String, primary_key=True)
+    price_band = Column(Integer, primary_key=True)
+    houses = Column(Integer, nullable=False, default=0)
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    # client supplied Idempotency-Key, scoped to the user that sent it
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    endpoint = Column(String, nullable=False)
+    status_code = Column(Integer, nullable=False)
+    response = Column(JSONB, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+# gist over (integer, tstzrange) needs btree_gist for the integer equality operator
+event.listen(
+    Booking.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist"),
+)
@@ -0,0 +1,103 @@
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import bindparam, Integer, text
+from sqlalchemy.dialects.postgresql import insert
+from models import HouseCalendar
+
+
+# Month bitmaps of booked nights per house: bit d-1 of a row is the night starting on
+# day d of that month. A stay covers the nights check_in.date() <= d < check_out.date()
+# in UTC, so stays that don't overlap in time never share a night.
+def utc_date(value: datetime) -> date:
+    if value.tzinfo is None:
+        return value.date()
+    return value.astimezone(timezone.utc).date()
+
+def nights_by_month(check_in: datetime, check_out: datetime):
+    first = utc_date(check_in)
+    last = utc_date(check_out)
+
+    masks = {}
+    day = first
+    while day < last:
+        month = day.replace(day=1)
+        masks[month] = masks.get(month, 0) | (1 << (day.day - 1))
+        day += timedelta(days=1)
+    return masks
+
+
+# (bits to set in booked, bits to set in pending, clear the stay's bits first)
+CALENDAR_UPDATES = {
+    "pending": (False, True, False),
+    "confirm": (True, False, True),
+    "cancel": (False, False, True),
+}
+
+# Built on the table rather than the mapped class: an ORM insert executed with a list of
+# rows takes the bulk-insert path, which drops "keep" since it isn't a column.
+_calendars = HouseCalendar.__table__
+_upsert = insert(_calendars).values(
+    house_id=bindparam("house_id"),
+    month=bindparam("month"),
+    booked=bindparam("set_booked"),
+    pending=bindparam("set_pending"),
+)
+_upsert = _upsert.on_conflict_do_update(
+    index_elements=[_calendars.c.house_id, _calendars.c.month],
+    set_={
+        "booked": _calendars.c.booked.op("&")(bindparam("keep", type_=Integer)).op("|")(_upsert.excluded.booked),
+        "pending": _calendars.c.pending.op("&")(bindparam("keep", type_=Integer)).op("|")(_upsert.excluded.pending),
+    },
+)
+
+
+# Apply the bookings' new status to their house calendars with atomic bit operations,
+# in the caller's transaction so the calendars commit together with the bookings.
+# All months of all bookings go out as one executemany.
+async def update_calendars(db, bookings, new_status: str):
+    set_booked, set_pending, clear = CALENDAR_UPDATES.get(new_status, CALENDAR_UPDATES["pending"])
+
+    rows = []
+    for booking in bookings:
+        for month, mask in nights_by_month(booking.check_in, booking.check_out).items():
+            rows.append({
+                "house_id": booking.house_id,
+                "month": month,
+                "set_booked": mask if set_booked else 0,
+                "set_pending": mask if set_pending else 0,
+                "keep": ~mask if clear else -1,
+            })
+
+    if rows:
+        await db.execute(_upsert, rows)
+
+
+async def update_calendar(db, booking, new_status: str):
+    await update_calendars(db, [booking], new_status)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+# recompute every calendar from the active bookings, for bulk-loaded data
+REBUILD_CALENDARS_SQL = text("""
+    INSERT INTO house_calendars (house_id, month, booked, pending)
+    SELECT
+        house_id,
+        date_trunc('month', night)::date,
+        bit_or(CASE WHEN status = 'confirm' THEN 1 << (extract(day FROM night)::int - 1) ELSE 0 END),
+        bit_or(CASE WHEN status <> 'confirm' THEN 1 << (extract(day FROM night)::int - 1) ELSE 0 END)
+    FROM bookings,
+        generate_series(
+            (check_in AT TIME ZONE 'UTC')::date,
+            (check_out AT TIME ZONE 'UTC')::date - 1,
+            interval '1 day'
+        ) AS night
+    WHERE status <> 'cancel'
+    GROUP BY 1, 2
+""")
+
+async def rebuild_calendars(conn):
+    await conn.execute(text("TRUNCATE house_calendars"))
+    await conn.execute(REBUILD_CALENDARS_SQL)
@@ -0,0 +1,46 @@
+import asyncio
+from collections import defaultdict
+from fastapi import WebSocket, WebSocketDisconnect
+
+# messages buffered per connection before the oldest is dropped for a slow client
+CONNECTION_QUEUE_SIZE = 100
+
+
+# In-process fan-out of booking events to each user's open WebSocket connections.
+# An idle connection costs one queue and one parked task, so a worker can hold thousands.
+class Hub:
+    def __init__(self):
+        self._queues = defaultdict(set)
+
+    def connection_count(self) -> int:
+        return sum(len(queues) for queues in self._queues.values())
+
+    def publish(self, user_id: int, message: dict):
+        for queue in self._queues.get(user_id, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    async def serve(self, websocket: WebSocket, user_id: int):
+        queue = asyncio.Queue(maxsize=CONNECTION_QUEUE_SIZE)
+        self._queues[user_id].add(queue)
+        sender = asyncio.create_task(self._send(websocket, queue))
+        try:
+            # clients don't send anything; this only waits for the disconnect
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            sender.cancel()
+            self._queues[user_id].discard(queue)
+            if not self._queues[user_id]:
+                del self._queues[user_id]
+
+    async def _send(self, websocket: WebSocket, queue: asyncio.Queue):
+        while True:
+            message = await queue.get()
+            await websocket.send_json(message)
+
+
+hub = Hub()
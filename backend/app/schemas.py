@@ -1,7 +1,7 @@
 # app/schemas.py
-from pydantic import BaseModel
-from datetime import datetime
-from typing import Optional
+from pydantic import BaseModel, ConfigDict
+from datetime import date, datetime
+from typing import Dict, List, Literal, Optional
 
 
 
@@ -18,8 +18,7 @@ class UserUpdate(BaseModel):
     profile_picture: Optional[str] = None
     role: Optional[str]
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Houses
 class HouseCreate(BaseModel):
@@ -44,8 +43,11 @@ class HouseOut(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+class HousePage(BaseModel):
+    items: List[HouseOut]
+    next_cursor: Optional[str] = None
 
 
 # bookings
@@ -56,8 +58,7 @@ class BookingCreate(BaseModel):
     check_out: datetime
     status: str
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class BookingOut(BaseModel):
     id: int
@@ -68,5 +69,66 @@ class BookingOut(BaseModel):
     status: str
     created_at: datetime
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+# owner dashboard
+class OwnerHouseOut(HouseOut):
+    bookings: List[BookingOut]
+    status_counts: Dict[str, int]
+
+class OwnerDashboard(BaseModel):
+    items: List[OwnerHouseOut]
+    next_cursor: Optional[str] = None
+    status_counts: Dict[str, int]
+
+
+# bulk operations
+class HouseBulkUpdate(HouseUpdate):
+    id: int
+
+class BookingBulkStatus(BaseModel):
+    ids: List[int]
+    status: Literal["confirm", "cancel"]
+
+class BulkItemResult(BaseModel):
+    id: int
+    result: str
+
+
+# occupancy calendar, bit d-1 of booked/pending is the night starting on day d
+class CalendarMonth(BaseModel):
+    month: date
+    booked: int
+    pending: int
+
+class HouseCalendarOut(BaseModel):
+    house_id: int
+    months: List[CalendarMonth]
+
+
+# listing facets
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+class PriceBandFacet(BaseModel):
+    band: int
+    min_price: Optional[float]
+    max_price: Optional[float]
+    count: int
+
+class HouseFacets(BaseModel):
+    total: int
+    locations: List[FacetCount]
+    price_bands: List[PriceBandFacet]
+
+# owner reports
+class OwnerReportRow(BaseModel):
+    house_id: int
+    title: str
+    month: date
+    nights: Dict[str, int]
+    bookings: Dict[str, int]
+    revenue: float
+    occupancy_rate: float
@@ -0,0 +1,25 @@
+from typing import List
+import orjson
+from fastapi import Response
+from pydantic import TypeAdapter
+from schemas import HouseOut, HousePage, HouseFacets, BookingOut
+
+# Built once at import, so responses don't rebuild validators per request
+house_out = TypeAdapter(HouseOut)
+house_page = TypeAdapter(HousePage)
+house_list = TypeAdapter(List[HouseOut])
+house_facets = TypeAdapter(HouseFacets)
+booking_list = TypeAdapter(List[BookingOut])
+
+
+class ORJSONBody(Response):
+    media_type = "application/json"
+
+
+# Validate ORM rows in one pass through the compiled adapter and write them with orjson,
+# skipping FastAPI's response_model re-validation and jsonable_encoder walk
+def dumps(adapter: TypeAdapter, value) -> bytes:
+    return orjson.dumps(adapter.dump_python(adapter.validate_python(value, from_attributes=True)))
+
+def list_response(adapter: TypeAdapter, rows) -> Response:
+    return ORJSONBody(dumps(adapter, rows))
@@ -0,0 +1,173 @@
+import os
+import re
+import time
+import asyncio
+import hashlib
+from fastapi import HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse
+from starlette.responses import FileResponse
+from starlette.datastructures import Headers
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+from PIL import Image
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(5 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# room for multipart boundaries, part headers and the other form fields next to the file
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+PROFILE_PICTURE_DIR = "uploads/profile_pictures"
+# unreferenced uploads are only deleted once nothing has written or reused them for this long
+UPLOAD_GC_GRACE = float(os.getenv("UPLOAD_GC_GRACE_SECONDS", "600"))
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+
+# fixed-size variants generated next to each original, e.g. <sha256>_thumb.jpg
+IMAGE_VARIANTS = {
+    "thumb": (128, 128),
+    "medium": (512, 512),
+}
+
+CONTENT_HASH = re.compile(r"^([0-9a-f]{64})(?:_[a-z]+)?\.[a-z]+$")
+
+
+def variant_path(path: str, variant: str) -> str:
+    stem, ext = os.path.splitext(path)
+    return f"{stem}_{variant}{ext}"
+
+
+def _write_chunk(out, digest, chunk: bytes):
+    out.write(chunk)
+    digest.update(chunk)
+
+
+# Stream an upload to disk in chunks, with file I/O and hashing off the event loop, and
+# store it content-addressed as <sha256><ext> in upload_dir, so identical uploads share
+# one file. Aborts with 413 as soon as the size cap is crossed and never leaves a partial file.
+async def save_upload(file: UploadFile, upload_dir: str, extension: str, max_bytes: int = MAX_UPLOAD_BYTES) -> str:
+    tmp_path = os.path.join(upload_dir, f".{os.urandom(8).hex()}.part")
+    digest = hashlib.sha256()
+    size = 0
+    out = await asyncio.to_thread(open, tmp_path, "wb")
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=413, detail=f"File too large, maximum is {max_bytes} bytes")
+            await asyncio.to_thread(_write_chunk, out, digest, chunk)
+    except BaseException:
+        await asyncio.to_thread(out.close)
+        await asyncio.to_thread(os.remove, tmp_path)
+        raise
+
+    await asyncio.to_thread(out.close)
+
+    path = os.path.join(upload_dir, digest.hexdigest() + extension)
+    if await asyncio.to_thread(os.path.exists, path):
+        # reused: the fresh mtime keeps the sweep off it until this upload's profile commits
+        await asyncio.to_thread(os.utime, path)
+        await asyncio.to_thread(os.remove, tmp_path)
+    else:
+        await asyncio.to_thread(os.replace, tmp_path, path)
+    return path
+
+
+# Reject oversized multipart requests on their Content-Length, before Starlette spools the
+# whole body to parse the form. Route dependencies only run after that parse, so this is a
+# middleware; save_upload still enforces the cap for chunked bodies without a length.
+async def limit_upload_size(request: Request, call_next):
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        length = request.headers.get("content-length", "")
+        if length.isdigit() and int(length) > MAX_UPLOAD_BYTES + UPLOAD_FORM_OVERHEAD:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"File too large, maximum is {MAX_UPLOAD_BYTES} bytes"},
+            )
+    return await call_next(request)
+
+
+def image_extension(file: UploadFile) -> str:
+    extension = os.path.splitext(file.filename or "")[1].lower()
+    if not (file.content_type or "").startswith("image/") or extension not in IMAGE_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Profile picture must be a jpg, png, gif or webp image")
+    return extension
+
+
+# resize an uploaded image into every IMAGE_VARIANTS size; meant to run as a background task.
+# Deduplicated uploads already have their variants, so existing ones are kept.
+def generate_variants(path: str):
+    missing = {v: size for v, size in IMAGE_VARIANTS.items() if not os.path.exists(variant_path(path, v))}
+    if not missing:
+        return
+
+    with Image.open(path) as image:
+        image = image.convert("RGB") if image.mode not in ("RGB", "L") else image
+        for variant, size in missing.items():
+            resized = image.copy()
+            resized.thumbnail(size)
+            resized.save(variant_path(path, variant))
+
+
+# remove an upload and its variants
+def remove_upload(path: str):
+    for candidate in [path] + [variant_path(path, v) for v in IMAGE_VARIANTS]:
+        try:
+            os.remove(candidate)
+        except FileNotFoundError:
+            pass
+
+
+# the original uploads in upload_dir, without their variants and in-progress .part files
+def list_uploads(upload_dir: str):
+    if not os.path.isdir(upload_dir):
+        return []
+    paths = []
+    for name in os.listdir(upload_dir):
+        stem, extension = os.path.splitext(name)
+        if name.startswith(".") or extension.lower() not in IMAGE_EXTENSIONS:
+            continue
+        if any(stem.endswith("_" + variant) for variant in IMAGE_VARIANTS):
+            continue
+        paths.append(os.path.join(upload_dir, name))
+    return paths
+
+
+# remove an unreferenced upload unless it was written or reused within UPLOAD_GC_GRACE
+def remove_stale_upload(path: str) -> bool:
+    try:
+        if time.time() - os.stat(path).st_mtime < UPLOAD_GC_GRACE:
+            return False
+    except FileNotFoundError:
+        return False
+    remove_upload(path)
+    return True
+
+
+# FileResponse that hands the file to the server for zero-copy sending when the ASGI server
+# supports the http.response.pathsend extension, and streams it in chunks otherwise.
+# Range requests keep the regular partial-content path.
+class SendfileResponse(FileResponse):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self._pathsend = "http.response.pathsend" in scope.get("extensions", {})
+        await super().__call__(scope, receive, send)
+
+    async def _handle_simple(self, send: Send, send_header_only: bool) -> None:
+        if send_header_only or not self._pathsend:
+            return await super()._handle_simple(send, send_header_only)
+
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        await send({"type": "http.response.pathsend", "path": os.path.abspath(self.path)})
+
+
+# Uploaded files never change once written: content-addressed files are named by their
+# sha256 (which doubles as a strong ETag), and older uploads have unique timestamped names.
+class UploadFiles(StaticFiles):
+    def file_response(self, full_path, stat_result, scope: Scope, status_code: int = 200):
+        headers = {"Cache-Control": "public, max-age=31536000, immutable"}
+        match = CONTENT_HASH.match(os.path.basename(full_path))
+        if match:
+            headers["ETag"] = f'"{match.group(0)}"'
+
+        response = SendfileResponse(full_path, status_code=status_code, stat_result=stat_result, headers=headers)
+
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -2,6 +2,12 @@ from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import os
+import base64
+import re
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from jose import jwt, JWTError
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
@@ -11,7 +17,9 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -20,6 +28,74 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+# bcrypt is CPU bound, so run it on a dedicated pool instead of blocking the event loop
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "4"))
+HASH_MAX_QUEUE = int(os.getenv("HASH_MAX_QUEUE", "64"))
+
+hash_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+# callers beyond workers + queue wait here, so a login storm can't grow the pool backlog unbounded
+hash_slots = asyncio.Semaphore(HASH_WORKERS + HASH_MAX_QUEUE)
+
+_hash_lock = threading.Lock()
+_hash_stats = {"queued": 0, "running": 0, "completed": 0, "total_wait": 0.0, "max_wait": 0.0}
+
+async def _run_hash(fn, *args):
+    # callers waiting for a slot already count as queued, and their wait includes it
+    submitted = time.perf_counter()
+    dequeued = False
+    with _hash_lock:
+        _hash_stats["queued"] += 1
+
+    def job():
+        nonlocal dequeued
+        wait = time.perf_counter() - submitted
+        with _hash_lock:
+            if not dequeued:
+                dequeued = True
+                _hash_stats["queued"] -= 1
+            _hash_stats["running"] += 1
+            _hash_stats["total_wait"] += wait
+            _hash_stats["max_wait"] = max(_hash_stats["max_wait"], wait)
+        try:
+            return fn(*args)
+        finally:
+            with _hash_lock:
+                _hash_stats["running"] -= 1
+                _hash_stats["completed"] += 1
+
+    try:
+        async with hash_slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(hash_executor, job)
+    finally:
+        # cancelled before the job started
+        with _hash_lock:
+            if not dequeued:
+                dequeued = True
+                _hash_stats["queued"] -= 1
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hash(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hash(verify_password, plain_password, hashed_password)
+
+def hash_stats():
+    with _hash_lock:
+        stats = dict(_hash_stats)
+    completed = stats["completed"]
+    return {
+        "workers": HASH_WORKERS,
+        "max_queue": HASH_MAX_QUEUE,
+        "rounds": BCRYPT_ROUNDS,
+        "queue_depth": stats["queued"],
+        "running": stats["running"],
+        "completed": completed,
+        "avg_wait_ms": (stats["total_wait"] / completed * 1000) if completed else 0.0,
+        "max_wait_ms": stats["max_wait"] * 1000,
+    }
+
+
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -34,4 +110,24 @@ def verify_jwt_token(token: str = Depends(oauth2_scheme)):
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
     except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
\ No newline at end of file
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+
+# keyset pagination cursors, an opaque "<created_at iso>|<id>" pair
+def encode_cursor(created_at: datetime, id: int) -> str:
+    raw = f"{created_at.isoformat()}|{id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# turn free text into a prefix tsquery, e.g. "sea vie" -> "sea:* & vie:*"
+def to_prefix_tsquery(text: str) -> str:
+    terms = re.findall(r"[^\W_]+", text.lower())
+    return " & ".join(f"{term}:*" for term in terms)
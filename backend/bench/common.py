@@ -0,0 +1,20 @@
+# shared between seed.py, loadtest.py and plans.py; loadtest.py must not import the app itself
+import io
+
+from PIL import Image
+
+BENCH_PASSWORD = "bench-password"
+
+# a valid 1x1 PNG for the profile upload scenarios, written by Pillow so the thumbnail
+# job can decode it
+_png = io.BytesIO()
+Image.new("RGB", (1, 1)).save(_png, "PNG")
+PNG_1X1 = _png.getvalue()
+
+
+def owner_email(i: int) -> str:
+    return f"bench_owner_{i}@example.com"
+
+
+def renter_email(i: int) -> str:
+    return f"bench_renter_{i}@example.com"
@@ -0,0 +1,40 @@
+"""Compare two loadtest.py result files route by route.
+
+    python bench/compare.py bench/results/before.json bench/results/after.json
+"""
+import argparse
+import json
+
+METRICS = ["throughput_rps", "p50_ms", "p95_ms", "p99_ms"]
+
+
+def change(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)["routes"]
+    with open(args.after) as f:
+        after = json.load(f)["routes"]
+
+    print(f"{'route':32} " + "  ".join(f"{metric:>24}" for metric in METRICS))
+    for route in before:
+        if route not in after:
+            continue
+        cells = []
+        for metric in METRICS:
+            b, a = before[route][metric], after[route][metric]
+            cells.append(f"{b:>8.1f} -> {a:>8.1f} {change(b, a):>6}")
+        print(f"{route:32} " + "  ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Drive every route the frontend uses and report throughput and latency percentiles.
+
+Start the API against a database filled by bench/seed.py, then run from backend/:
+
+    python bench/loadtest.py --base-url http://localhost:8000 --requests 500 --concurrency 20
+
+Results are printed and saved as JSON under bench/results/ for bench/compare.py.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from common import BENCH_PASSWORD, PNG_1X1, owner_email, renter_email
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Session:
+    def __init__(self, client: httpx.AsyncClient, args, rng: random.Random):
+        self.client = client
+        self.args = args
+        self.rng = rng
+        self.owners = []
+        self.renters = []
+        self.owner_bookings = {}
+
+    async def login(self, email: str):
+        response = await self.client.post("/login", json={"email": email, "password": BENCH_PASSWORD})
+        response.raise_for_status()
+        data = response.json()
+        return {"id": data["user"]["id"], "headers": {"Authorization": f"Bearer {data['access_token']}"}}
+
+    async def setup(self):
+        self.owners = [await self.login(owner_email(i)) for i in range(self.args.users)]
+        self.renters = [await self.login(renter_email(i)) for i in range(self.args.users)]
+
+        # bookings each owner may confirm/cancel during the run
+        for owner in self.owners:
+            response = await self.client.get("/owner/dashboard", params={"limit": 100}, headers=owner["headers"])
+            response.raise_for_status()
+            ids = [b["id"] for house in response.json()["items"] for b in house["bookings"] if b["status"] != "cancel"]
+            self.owner_bookings[owner["id"]] = ids
+
+    # --- one coroutine per route, each issuing a single request ---
+
+    def login_request(self):
+        email = renter_email(self.rng.randrange(self.args.users))
+        return self.client.post("/login", json={"email": email, "password": BENCH_PASSWORD})
+
+    def houses(self):
+        return self.client.get("/houses", params={"limit": 20})
+
+    def houses_user(self):
+        return self.client.get("/houses/user", headers=self.rng.choice(self.owners)["headers"])
+
+    def create_booking(self):
+        start = datetime.now(timezone.utc) + timedelta(days=self.rng.randint(200, 2000))
+        return self.client.post(
+            "/bookings",
+            json={
+                "house_id": self.rng.randint(1, self.args.houses),
+                "check_in": start.isoformat(),
+                "check_out": (start + timedelta(days=self.rng.randint(1, 5))).isoformat(),
+                "status": "pending",
+            },
+            headers=self.rng.choice(self.renters)["headers"],
+        )
+
+    def bookings_all(self):
+        return self.client.get("/bookings/all")
+
+    def _owner_booking(self):
+        owner = self.rng.choice(self.owners)
+        ids = self.owner_bookings[owner["id"]] or [0]
+        return owner, self.rng.choice(ids)
+
+    def confirm_booking(self):
+        owner, booking_id = self._owner_booking()
+        return self.client.put(f"/bookings/{booking_id}/confirm", headers=owner["headers"])
+
+    def cancel_booking(self):
+        owner, booking_id = self._owner_booking()
+        return self.client.put(f"/bookings/{booking_id}/cancel", headers=owner["headers"])
+
+    def profile_upload(self):
+        renter = self.rng.choice(self.renters)
+        return self.client.patch(
+            f"/users/{renter['id']}/profile",
+            files={"file": ("bench.png", io.BytesIO(PNG_1X1), "image/png")},
+            data={"username": "bench"},
+            headers=renter["headers"],
+        )
+
+
+SCENARIOS = [
+    ("POST /login", "login_request"),
+    ("GET /houses", "houses"),
+    ("GET /houses/user", "houses_user"),
+    ("POST /bookings", "create_booking"),
+    ("GET /bookings/all", "bookings_all"),
+    ("PUT /bookings/{id}/confirm", "confirm_booking"),
+    ("PUT /bookings/{id}/cancel", "cancel_booking"),
+    ("PATCH /users/{id}/profile", "profile_upload"),
+]
+
+
+async def run_scenario(session: Session, method_name: str, total: int, concurrency: int):
+    make_request = getattr(session, method_name)
+    latencies = []
+    status_codes = {}
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                response = await make_request()
+                code = str(response.status_code)
+            except httpx.HTTPError:
+                code = "error"
+            latencies.append((time.perf_counter() - start) * 1000)
+            status_codes[code] = status_codes.get(code, 0) + 1
+            if code == "error" or code.startswith("5"):
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "status_codes": status_codes,
+        "throughput_rps": round(total / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def main_async(args):
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30) as client:
+        session = Session(client, args, rng)
+        await session.setup()
+
+        routes = {}
+        for name, method_name in SCENARIOS:
+            if args.only and args.only not in name:
+                continue
+            routes[name] = await run_scenario(session, method_name, args.requests, args.concurrency)
+            r = routes[name]
+            print(f"{name:32} {r['throughput_rps']:>9.1f} req/s  p50 {r['p50_ms']:>8.1f}  "
+                  f"p95 {r['p95_ms']:>8.1f}  p99 {r['p99_ms']:>8.1f} ms  errors {r['errors']}")
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "base_url": args.base_url,
+            "requests_per_route": args.requests,
+            "concurrency": args.concurrency,
+            "users": args.users,
+            "houses": args.houses,
+            "python": platform.python_version(),
+        },
+        "routes": routes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=500, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--users", type=int, default=10, help="seeded owners and renters to log in as")
+    parser.add_argument("--houses", type=int, default=1000, help="number of seeded houses")
+    parser.add_argument("--only", help="run only routes whose name contains this text")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="result file, defaults to bench/results/<timestamp>.json")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
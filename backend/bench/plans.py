@@ -0,0 +1,218 @@
+"""Check the query plan of every statement the auth.py handlers issue.
+
+Calls each route in-process against a database filled by bench/seed.py, records the SQL
+every handler runs, and EXPLAINs it. Exits non-zero when a plan sequentially scans a
+table with more than --max-rows rows, printing an index suggestion for each such scan.
+Run from backend/:
+
+    DATABASE_URL=postgresql+asyncpg://... python bench/plans.py --max-rows 1000
+
+The write routes run for real, so only point this at the throwaway bench database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+sys.path.insert(0, APP_DIR)
+os.chdir(APP_DIR)  # the app serves ./uploads relative to its own directory
+os.makedirs("uploads", exist_ok=True)
+
+from sqlalchemy import event, text  # noqa: E402
+from database import Base, engine, replica_engines  # noqa: E402
+from main import app  # noqa: E402
+from common import BENCH_PASSWORD, PNG_1X1, owner_email, renter_email  # noqa: E402
+
+# routes that return whole tables on purpose
+FULL_SCAN_ROUTES = {"GET /bookings/all", "GET /bookings/export", "GET /houses/export"}
+
+EXPLAINABLE = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+
+current_route = ContextVar("current_route", default=None)
+
+# (route, statement) -> the parameters of its first execution
+captured = {}
+
+
+def record_statement(conn, cursor, statement, parameters, context, executemany):
+    route = current_route.get()
+    if route is None or statement.lstrip().split(None, 1)[0].upper() not in EXPLAINABLE:
+        return
+    # a list of parameter sets, except for insertmanyvalues batches, which are one flat set
+    if executemany and isinstance(parameters, list):
+        parameters = parameters[0]
+    captured.setdefault((route, statement), parameters)
+
+
+class Driver:
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+
+    async def call(self, route: str, path: str, **kwargs):
+        token = current_route.set(route)
+        try:
+            return await self.client.request(route.split()[0], path, **kwargs)
+        finally:
+            current_route.reset(token)
+
+    async def login(self, email: str):
+        response = await self.call("POST /login", "/login", json={"email": email, "password": BENCH_PASSWORD})
+        response.raise_for_status()
+        data = response.json()
+        return {"id": data["user"]["id"], "headers": {"Authorization": f"Bearer {data['access_token']}"}}
+
+    async def run(self):
+        owner = await self.login(owner_email(0))
+        renter = await self.login(renter_email(0))
+        owner_headers, renter_headers = owner["headers"], renter["headers"]
+
+        await self.call("GET /protected", "/protected", headers=renter_headers)
+        await self.call("GET /houses", "/houses", params={"limit": 20})
+        await self.call("GET /houses", "/houses", params={"limit": 20, "location": "Kigali", "min_price": 50, "max_price": 300})
+        await self.call("GET /houses", "/houses", params={"limit": 20, "owner_id": owner["id"]})
+
+        page = (await self.call("GET /houses", "/houses", params={"limit": 2})).json()
+        if page["next_cursor"]:
+            await self.call("GET /houses", "/houses", params={"limit": 20, "cursor": page["next_cursor"]})
+
+        start = datetime.now(timezone.utc) + timedelta(days=30)
+        stay = {"check_in": start.isoformat(), "check_out": (start + timedelta(days=3)).isoformat()}
+        await self.call("GET /houses/available", "/houses/available", params={**stay, "limit": 20})
+        await self.call("GET /houses/available", "/houses/available", params={**stay, "limit": 20, "location": "Kigali"})
+        await self.call("GET /houses/facets", "/houses/facets", params={"location": "Kigali", "price_band": 2})
+        await self.call("GET /houses/search", "/houses/search", params={"q": "cozy villa"})
+        await self.call("GET /houses/export", "/houses/export", headers=owner_headers)
+
+        houses = (await self.call("GET /houses/user", "/houses/user", headers=owner_headers)).json()
+        await self.call("GET /owner/dashboard", "/owner/dashboard", params={"limit": 100}, headers=owner_headers)
+        await self.call("GET /owner/reports", "/owner/reports", headers=owner_headers)
+
+        house_id = houses[0]["id"]
+        await self.call("GET /houses/user/{house_id}", f"/houses/user/{house_id}", headers=owner_headers)
+        await self.call("GET /houses/{house_id}", f"/houses/{house_id}")
+        await self.call("GET /houses/{house_id}/calendar", f"/houses/{house_id}/calendar", params={"months": 6})
+
+        # writes, on houses and bookings created here so the seeded data stays usable
+        listing = {"title": "Plan check", "description": "Created by bench/plans.py", "price": 100, "location": "Kigali"}
+        created = (await self.call("POST /houses", "/houses", json=listing, headers=owner_headers)).json()
+        await self.call("PATCH /houses/{house_id}", f"/houses/{created['id']}", json={**listing, "price": 120}, headers=owner_headers)
+        bulk = (await self.call("POST /houses/bulk", "/houses/bulk", json=[listing, listing], headers=owner_headers)).json()
+        bulk_ids = [house["id"] for house in bulk]
+        await self.call("PATCH /houses/bulk", "/houses/bulk", json=[{**listing, "id": id} for id in bulk_ids], headers=owner_headers)
+        await self.call("DELETE /houses/bulk", "/houses/bulk", json=bulk_ids, headers=owner_headers)
+
+        far = datetime.now(timezone.utc) + timedelta(days=3000)
+        booking_ids = []
+        for offset in range(3):
+            check_in = far + timedelta(days=offset * 10)
+            body = {"house_id": created["id"], "check_in": check_in.isoformat(),
+                    "check_out": (check_in + timedelta(days=2)).isoformat(), "status": "pending"}
+            response = await self.call("POST /bookings", "/bookings", json=body, headers=renter_headers)
+            booking_ids.append(response.json()["id"])
+        await self.call("PUT /bookings/{booking_id}/confirm", f"/bookings/{booking_ids[0]}/confirm", headers=owner_headers)
+        await self.call("PUT /bookings/{booking_id}/cancel", f"/bookings/{booking_ids[1]}/cancel", headers=owner_headers)
+        await self.call("POST /bookings/bulk/status", "/bookings/bulk/status",
+                        json={"ids": booking_ids[1:], "status": "cancel"}, headers=owner_headers)
+
+        await self.call("GET /bookings/user", "/bookings/user", headers=renter_headers)
+        await self.call("GET /bookings/all", "/bookings/all")
+        await self.call("GET /bookings/export", "/bookings/export", headers=owner_headers)
+
+        await self.call("PATCH /users/{user_id}/profile", f"/users/{renter['id']}/profile",
+                        files={"file": ("plan.png", PNG_1X1, "image/png")}, data={"username": "renter0"},
+                        headers=renter_headers)
+        await self.call("DELETE /houses/{house_id}", f"/houses/{created['id']}", headers=owner_headers)
+
+
+def seq_scans(node, conditions=()):
+    conditions = [*conditions, *(node[key] for key in ("Hash Cond", "Merge Cond", "Join Filter") if key in node)]
+    if node["Node Type"] == "Seq Scan":
+        yield node, conditions
+    for child in node.get("Plans", []):
+        yield from seq_scans(child, conditions)
+
+
+# the table's columns that the scan filters or joins on, in order of appearance
+def suggested_columns(table: str, node, conditions):
+    columns = [column.name for column in Base.metadata.tables[table].columns] if table in Base.metadata.tables else []
+    found = re.findall(r"\b(\w+)\b", node.get("Filter", ""))
+    alias = node.get("Alias", table)
+    for condition in conditions:
+        found += re.findall(rf"\b{re.escape(alias)}\.(\w+)", condition)
+    return list(dict.fromkeys(name for name in found if name in columns))
+
+
+async def explain(max_rows: int):
+    async with engine.connect() as conn:
+        await conn.execute(text("ANALYZE"))
+        result = await conn.execute(text("""
+            SELECT c.relname, greatest(c.reltuples, 0)::bigint, coalesce(p.relname, c.relname)
+            FROM pg_class c
+            LEFT JOIN pg_inherits i ON i.inhrelid = c.oid
+            LEFT JOIN pg_class p ON p.oid = i.inhparent
+            WHERE c.relkind IN ('r', 'p')
+        """))
+        relations = {name: (rows, parent) for name, rows, parent in result}
+
+        failures = []
+        for (route, statement), parameters in captured.items():
+            result = await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters)
+            plan = result.scalar()
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+
+            # partitions count towards their parent table
+            scanned = {}
+            for node, conditions in seq_scans(plan[0]["Plan"]):
+                rows, table = relations.get(node["Relation Name"], (0, node["Relation Name"]))
+                total, columns = scanned.get(table, (0, []))
+                scanned[table] = (total + rows, columns + suggested_columns(table, node, conditions))
+
+            for table, (rows, columns) in scanned.items():
+                if rows > max_rows and route not in FULL_SCAN_ROUTES:
+                    failures.append((route, statement, table, rows, list(dict.fromkeys(columns))))
+        await conn.rollback()
+
+    return failures
+
+
+async def main_async(args):
+    for bind in [engine, *replica_engines]:
+        event.listen(bind.sync_engine, "before_cursor_execute", record_statement)
+
+    # a handler that errors answers 500 here; the statements it ran are still explained
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://plans") as client:
+        await Driver(client).run()
+
+    failures = await explain(args.max_rows)
+    await engine.dispose()
+
+    routes = sorted({route for route, _ in captured})
+    print(f"explained {len(captured)} statements from {len(routes)} routes")
+    for route, statement, table, rows, columns in failures:
+        print(f"\nFAIL {route}: sequential scan of {table} (~{rows} rows)")
+        print("  " + " ".join(statement.split())[:300])
+        if columns:
+            print(f"  suggestion: CREATE INDEX ON {table} ({', '.join(columns)})")
+        else:
+            print("  suggestion: the statement has no predicate on this table; add a filter or LIMIT")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-rows", type=int, default=int(os.getenv("PLAN_MAX_SEQ_SCAN_ROWS", "1000")),
+                        help="largest table a plan may scan sequentially")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Seed a local database with synthetic users, houses and bookings for load tests.
+
+Run from backend/ against a migrated database (``alembic upgrade head``):
+
+    DATABASE_URL=postgresql+asyncpg://... python bench/seed.py --owners 100 --renters 1000
+
+Every seeded user has the password ``bench-password``.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from sqlalchemy import insert, text  # noqa: E402
+from database import engine  # noqa: E402
+from models import User, House, Booking  # noqa: E402
+from utils import hash_password  # noqa: E402
+from occupancy import rebuild_calendars  # noqa: E402
+from common import BENCH_PASSWORD, owner_email, renter_email  # noqa: E402
+
+BATCH_SIZE = 5000
+LOCATIONS = ["Kigali", "Musanze", "Rubavu", "Huye", "Nyagatare", "Karongi", "Rusizi", "Muhanga"]
+STATUSES = ["pending", "confirm", "cancel"]
+
+
+async def insert_batches(conn, model, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        await conn.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+
+async def seed(owners: int, renters: int, houses_per_owner: int, bookings_per_house: int, rng: random.Random):
+    # hash once; bcrypt per row would dominate seeding time
+    password = hash_password(BENCH_PASSWORD)
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+    async with engine.begin() as conn:
+        await conn.execute(text("TRUNCATE bookings, houses, house_facets, idempotency_keys, users RESTART IDENTITY CASCADE"))
+
+        users = [
+            {"email": owner_email(i), "username": f"owner{i}", "password": password, "role": "owner"}
+            for i in range(owners)
+        ] + [
+            {"email": renter_email(i), "username": f"renter{i}", "password": password, "role": "renter"}
+            for i in range(renters)
+        ]
+        await insert_batches(conn, User, users)
+
+        houses = []
+        for owner_id in range(1, owners + 1):
+            for _ in range(houses_per_owner):
+                # houses.created_at/updated_at are naive UTC columns
+                created = (now - timedelta(days=rng.randint(0, 365), minutes=rng.randint(0, 1440))).replace(tzinfo=None)
+                houses.append({
+                    "title": f"{rng.choice(['Cozy', 'Modern', 'Quiet', 'Sunny'])} {rng.choice(['villa', 'apartment', 'studio', 'house'])}",
+                    "description": "Synthetic listing for load testing",
+                    "price": round(rng.uniform(20, 500), 2),
+                    "location": rng.choice(LOCATIONS),
+                    "user_id": owner_id,
+                    "created_at": created,
+                    "updated_at": created,
+                })
+        await insert_batches(conn, House, houses)
+
+        # back-to-back stays per house, so the overlap check holds
+        bookings = []
+        for house_id in range(1, len(houses) + 1):
+            start = now - timedelta(days=rng.randint(0, 180))
+            for _ in range(bookings_per_house):
+                nights = rng.randint(1, 7)
+                bookings.append({
+                    "house_id": house_id,
+                    "user_id": rng.randint(owners + 1, owners + renters),
+                    "check_in": start,
+                    "check_out": start + timedelta(days=nights),
+                    "status": rng.choice(STATUSES),
+                    "created_at": start.replace(tzinfo=None) - timedelta(days=1),
+                })
+                start += timedelta(days=nights + rng.randint(0, 3))
+        # the migration only creates partitions from its own month on; without these the
+        # past stays would all land in bookings_default
+        await conn.execute(
+            text("SELECT create_booking_partitions(:first, :last)"),
+            {"first": min(b["check_in"] for b in bookings).date(), "last": max(b["check_in"] for b in bookings).date()},
+        )
+        await insert_batches(conn, Booking, bookings)
+        # bulk inserts bypass the handlers that maintain the calendars
+        await rebuild_calendars(conn)
+
+    await engine.dispose()
+    return len(users), len(houses), len(bookings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--owners", type=int, default=50)
+    parser.add_argument("--renters", type=int, default=500)
+    parser.add_argument("--houses-per-owner", type=int, default=20)
+    parser.add_argument("--bookings-per-house", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    counts = asyncio.run(seed(
+        args.owners, args.renters, args.houses_per_owner, args.bookings_per_house, random.Random(args.seed)
+    ))
+    print("seeded %d users, %d houses, %d bookings" % counts)
+
+
+if __name__ == "__main__":
+    main()
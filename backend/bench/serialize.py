@@ -0,0 +1,89 @@
+"""Micro-benchmark: serialization cost of a 10k-row list response, before and after.
+
+    python bench/serialize.py --rows 10000 --repeat 5
+
+"before" is FastAPI's generic response_model path (validate, serialize, json.dumps);
+"after" is the precompiled TypeAdapter + orjson path in app/serialization.py.
+Rows are plain objects standing in for ORM instances, so no database is needed.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+from schemas import HouseOut, BookingOut  # noqa: E402
+from serialization import house_list, booking_list, list_response  # noqa: E402
+
+
+def make_houses(n: int):
+    now = datetime(2026, 1, 1)
+    return [
+        SimpleNamespace(
+            id=i, title=f"House {i}", description="A synthetic listing " * 4, price=100.0 + i % 400,
+            location="Kigali", user_id=i % 100, created_at=now, updated_at=now,
+        )
+        for i in range(n)
+    ]
+
+
+def make_bookings(n: int):
+    now = datetime(2026, 1, 1)
+    return [
+        SimpleNamespace(
+            id=i, house_id=i % 1000, user_id=i % 500, check_in=now, check_out=now + timedelta(days=3),
+            status="pending", created_at=now,
+        )
+        for i in range(n)
+    ]
+
+
+async def before(field, rows) -> bytes:
+    content = await serialize_response(field=field, response_content=rows, is_coroutine=True)
+    return JSONResponse(content).body
+
+
+def after(adapter, rows) -> bytes:
+    return list_response(adapter, rows).body
+
+
+def timed(fn, repeat: int):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn()
+        runs.append((time.perf_counter() - start) * 1000)
+    return statistics.median(runs), len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cases = [
+        ("List[HouseOut]", make_houses(args.rows), List[HouseOut], house_list),
+        ("List[BookingOut]", make_bookings(args.rows), List[BookingOut], booking_list),
+    ]
+    loop = asyncio.new_event_loop()
+    for name, rows, annotation, adapter in cases:
+        field = create_model_field(name="Response", type_=annotation, mode="serialization")
+        before_ms, before_size = timed(lambda: loop.run_until_complete(before(field, rows)), args.repeat)
+        after_ms, after_size = timed(lambda: after(adapter, rows), args.repeat)
+        print(f"{name:18} {args.rows} rows  before {before_ms:8.1f} ms ({before_size} B)  "
+              f"after {after_ms:8.1f} ms ({after_size} B)  speedup {before_ms / after_ms:5.1f}x")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
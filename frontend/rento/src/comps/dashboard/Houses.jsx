@@ -10,22 +10,30 @@ const AvailableHouses = () => {
   const [checkIn, setCheckIn] = useState("");
   const [checkOut, setCheckOut] = useState("");
   const [bookingLoading, setBookingLoading] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
-  useEffect(() => {
-    const fetchHouses = async () => {
-      try {
-        const response = await api.get("/houses");
-        setHouses(response.data);
-      } catch (error) {
-        console.error("Failed to fetch houses:", error);
-      } finally {
-        setLoading(false);
-      }
-    };
+  // /houses is keyset paginated; each page carries the cursor of the next one
+  const fetchHouses = async (cursor = null) => {
+    try {
+      const response = await api.get("/houses", { params: cursor ? { cursor } : {} });
+      setHouses((prev) => (cursor ? [...prev, ...response.data.items] : response.data.items));
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error("Failed to fetch houses:", error);
+    }
+  };
 
-    fetchHouses();
+  useEffect(() => {
+    fetchHouses().finally(() => setLoading(false));
   }, []);
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    await fetchHouses(nextCursor);
+    setLoadingMore(false);
+  };
+
   const handleHouseClick = async (e, houseId) => { 
     e.preventDefault();
     try {
@@ -112,6 +120,24 @@ const AvailableHouses = () => {
         </div>
       )}
 
+      {!loading && nextCursor && (
+        <div className="flex justify-center mt-6">
+          <button
+            onClick={loadMore}
+            disabled={loadingMore}
+            className="bg-orange-500 text-white px-4 py-2 rounded-lg hover:bg-orange-600 transition"
+          >
+            {loadingMore ? (
+              <span className="flex items-center">
+                <FaSpinner className="animate-spin mr-2" /> Loading...
+              </span>
+            ) : (
+              "Load more"
+            )}
+          </button>
+        </div>
+      )}
+
       {/* Modal */}
       {singleHouse && (
         <div className="fixed inset-0 bg-black/50 flex items-center justify-center z-50">
@@ -15,21 +15,18 @@ const DashboardBookings = () => {
   useEffect(() => {
     const fetchUserData = async () => {
       try {
-        // Fetch user's houses
-        const housesResponse = await api.get("/houses/user");
-        setHouses(housesResponse.data);
-
-        // Fetch all bookings
-        const bookingsResponse = await api.get("/bookings/all");
-        const allBookings = bookingsResponse.data;
-
-        // Filter bookings where the house belongs to the user
-        const userHouseIds = housesResponse.data.map((house) => house.id);
-        const userBookings = allBookings.filter((booking) =>
-          userHouseIds.includes(booking.house_id)
-        );
-
-        setBookings(userBookings);
+        // Fetch the owner's houses together with their bookings, following every page
+        const ownerHouses = [];
+        let cursor = null;
+        do {
+          const response = await api.get("/owner/dashboard", {
+            params: cursor ? { limit: 100, cursor } : { limit: 100 },
+          });
+          ownerHouses.push(...response.data.items);
+          cursor = response.data.next_cursor;
+        } while (cursor);
+        setHouses(ownerHouses);
+        setBookings(ownerHouses.flatMap((house) => house.bookings));
       } catch (error) {
         console.error("Error fetching bookings:", error);
       } finally {